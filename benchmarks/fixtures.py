@@ -0,0 +1,130 @@
+'''Synthetic documents for the benchmarks. Everything is generated locally and deterministically.'''
+import random
+from PIL import Image, ImageDraw, ImageFont
+from src.model.pdf_writer import PdfWriter, encode_image
+
+PAGE_SIZE_PT = (612, 792)
+LINES_PER_PAGE = 40
+WORDS = ('invoice', 'customer', 'account', 'payment', 'address', 'contract', 'total', 'amount', 'date',
+         'reference', 'number', 'street', 'phone', 'email', 'signed', 'agreement', 'the', 'of', 'and', 'to')
+
+
+def page_lines(page, seed=0):
+    '''Return the text lines of a synthetic page, with a few SSNs, emails and names mixed in.'''
+    rng = random.Random(seed * 10007 + page)
+    lines = []
+    for line in range(LINES_PER_PAGE):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 11))]
+        if line % 7 == 3:
+            words.insert(rng.randint(0, len(words)), f"{rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}")
+        if line % 11 == 5:
+            words.insert(rng.randint(0, len(words)), 'John Smith')
+        if line % 13 == 8:
+            words.append(f"j.smith{rng.randint(1, 99)}@example.com")
+        lines.append(' '.join(words))
+    return lines
+
+
+def write_pdf(path, contents):
+    '''Write a minimal PDF with one page per content stream; an empty stream gives a page without text.
+
+    Pages can use the font /F1 (Helvetica) and the image /Im1, a gray 2x2 pixel scan.
+    '''
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+               b'<< /Type /XObject /Subtype /Image /Width 2 /Height 2 /ColorSpace /DeviceGray /BitsPerComponent 8 /Length 4 >>\n'
+               b'stream\n\x80\x80\x80\x80\nendstream']
+    kids = []
+    for stream in contents:
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 4 0 R >> >> >>'
+                       % (PAGE_SIZE_PT[0], PAGE_SIZE_PT[1], len(objects)))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_text_pdf(path, pages, seed=0):
+    '''Write a born-digital PDF with a text layer in Helvetica.'''
+    contents = []
+    for page in range(pages):
+        commands = [b'BT /F1 11 Tf 14 TL 56 740 Td']
+        for line in page_lines(page, seed):
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            commands.append(b'(%s) Tj T*' % escaped.encode('latin-1'))
+        commands.append(b'ET')
+        contents.append(b'\n'.join(commands))
+    write_pdf(path, contents)
+
+
+def scan_image(page, seed=0, dpi=150):
+    '''Return a grayscale page image that looks like a slightly noisy scan.'''
+    scale = dpi / 72
+    width, height = int(PAGE_SIZE_PT[0] * scale), int(PAGE_SIZE_PT[1] * scale)
+    image = Image.new('L', (width, height), color=245)
+    draw = ImageDraw.Draw(image)
+    font = _scan_font(scale)
+    y = int(52 * scale)
+    for line in page_lines(page, seed):
+        draw.text((int(56 * scale), y), line, fill=20, font=font)
+        y += int(14 * scale)
+    rng = random.Random(seed + page)
+    for _ in range(2000):
+        draw.point((rng.randrange(width), rng.randrange(height)), fill=rng.randint(150, 230))
+    return image
+
+
+def _scan_font(scale):
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', int(11 * scale))
+    except OSError:
+        return ImageFont.load_default()
+
+
+def sparse_image(seed=0, dpi=150):
+    '''Return a scanned letter page with only a few text blocks, where OCR of text regions pays off.'''
+    scale = dpi / 72
+    image = Image.new('L', (int(PAGE_SIZE_PT[0] * scale), int(PAGE_SIZE_PT[1] * scale)), color=245)
+    draw = ImageDraw.Draw(image)
+    font = _scan_font(scale)
+    lines = page_lines(0, seed)
+    for top, block in ((52, lines[:4]), (400, lines[4:7]), (700, lines[7:9])):
+        for i, line in enumerate(block):
+            draw.text((int(56 * scale), int((top + 14 * i) * scale)), line, fill=20, font=font)
+    return image
+
+
+def form_image(seed=0, dpi=150):
+    '''Return a scanned form page: short labels and values in a grid, many regions that are merged into rows.'''
+    scale = dpi / 72
+    image = Image.new('L', (int(PAGE_SIZE_PT[0] * scale), int(PAGE_SIZE_PT[1] * scale)), color=245)
+    draw = ImageDraw.Draw(image)
+    font = _scan_font(scale)
+    rng = random.Random(seed)
+    for row in range(24):
+        for column in range(3):
+            text = f"{rng.choice(WORDS)}: {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}"
+            draw.text((int((40 + 190 * column) * scale), int((60 + 28 * row) * scale)), text, fill=20, font=font)
+    return image
+
+
+def write_scanned_pdf(path, pages, seed=0):
+    '''Write an image-only PDF, as produced by a scanner.'''
+    with PdfWriter(path) as writer:
+        for page in range(pages):
+            writer.add_page(encode_image(scan_image(page, seed)), *PAGE_SIZE_PT)
+
+
+def write_scan_png(path, page=0, seed=0):
+    scan_image(page, seed).save(path)
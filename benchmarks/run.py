@@ -0,0 +1,354 @@
+'''Benchmarks of the open, render, search, redact and export hot paths.
+
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run -o new.json --compare results.json
+
+Every benchmark runs in its own process so its peak RSS can be measured. The
+result file is JSON with the median and minimum time, peak RSS and output
+size of each benchmark. OCR benchmarks are skipped when Tesseract is not
+installed.
+'''
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import fixtures
+from src.model import model, preprocess
+from src.model.document import load_document, save_document
+from src.model.ocr_engine import OcrEngine
+from src.model.patterns import PatternSet
+
+PATTERNS = [r'\d{3}-\d{2}-\d{4}', r'john\s+smith', r'[\w.]+@example\.com']
+BENCHMARKS = {}
+
+
+class Skip(Exception):
+    pass
+
+
+class Context:
+    '''Fixture paths and timing of one benchmark run.'''
+
+    def __init__(self, workdir, pages):
+        self.workdir = workdir
+        self.pages = pages
+        self.text_pdf = os.path.join(workdir, f'text_{pages}.pdf')
+        self.scanned_pdf = os.path.join(workdir, f'scanned_{pages}.pdf')
+        self.scan_png = os.path.join(workdir, 'scan.png')
+        self.times = []
+        self.extra = {}
+
+    def prepare(self):
+        if not os.path.exists(self.text_pdf):
+            fixtures.write_text_pdf(self.text_pdf, self.pages)
+        if not os.path.exists(self.scanned_pdf):
+            fixtures.write_scanned_pdf(self.scanned_pdf, self.pages)
+        if not os.path.exists(self.scan_png):
+            fixtures.write_scan_png(self.scan_png)
+
+    @contextmanager
+    def timed(self):
+        started = time.perf_counter()
+        yield
+        self.times.append(time.perf_counter() - started)
+
+
+def benchmark(function):
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def require_ocr():
+    try:
+        model.get_backend(model.TESSERACT_LANG, model.TESSERACT_CONFIG).version()
+    except Exception:
+        raise Skip('Tesseract is not installed') from None
+
+
+def redact_lines(container, count):
+    '''Add count rectangles in rows over the page.'''
+    width, height = container.image.size
+    for i in range(count):
+        x, y = 40 + (i * 37) % (width - 160), 40 + (i * 23) % (height - 60)
+        container.draw_rectangle((x, y), (x + 120, y + 18))
+
+
+@benchmark
+def open_pdf(ctx):
+    '''Load a born-digital PDF and render its first page, as open_file does.'''
+    with ctx.timed():
+        containers = load_document(ctx.text_pdf)
+        containers[0].image
+
+
+@benchmark
+def open_scan(ctx):
+    with ctx.timed():
+        containers = load_document(ctx.scan_png)
+        containers[0].image.load()
+
+
+@benchmark
+def render_pages(ctx):
+    containers = load_document(ctx.scanned_pdf)
+    with ctx.timed():
+        for container in containers:
+            container.image
+
+
+@benchmark
+def scale_image(ctx):
+    container = load_document(ctx.scanned_pdf)[0]
+    container.load()
+    with ctx.timed():
+        for scale in (0.5, 0.8, 1.2):
+            container.scale_image(scale)
+
+
+@benchmark
+def search_text_layer(ctx):
+    containers = load_document(ctx.text_pdf)
+    pattern_set = PatternSet(PATTERNS)
+    with ctx.timed():
+        matches = sum(len(container.search_patterns(pattern_set)) for container in containers)
+    ctx.extra['matches'] = matches
+
+
+@benchmark
+def search_ocr_cold(ctx):
+    require_ocr()
+    containers = load_document(ctx.scanned_pdf)[:3]
+    engine = OcrEngine(cache=None)
+    try:
+        # Only the recognition is timed, not starting the worker processes
+        engine.start()
+        with ctx.timed():
+            for _, container in engine.run(containers):
+                container.search_text(PATTERNS[0])
+    finally:
+        engine.shutdown()
+
+
+@benchmark
+def search_ocr_cached(ctx):
+    require_ocr()
+    containers = load_document(ctx.scanned_pdf)[:3]
+    for container in containers:
+        container.run_ocr()
+    with ctx.timed():
+        for pattern in PATTERNS:
+            for container in containers:
+                container.search_text(pattern)
+
+
+def words(data):
+    '''Return the recognized words of Tesseract word data.'''
+    return [text.strip() for text in data['text'] if text.strip()]
+
+
+def ocr_pages(ctx, regions):
+    '''OCR a dense scan, a sparse letter and a form, as whole pages or by text regions.'''
+    require_ocr()
+    pages = {'scan': fixtures.scan_image(0), 'sparse': fixtures.sparse_image(), 'form': fixtures.form_image()}
+    arrays = {name: np.asarray(image) for name, image in pages.items()}
+    model.image_to_data(arrays['sparse'][:64, :64])  # load the engine outside the timed region
+    with ctx.timed():
+        for array in arrays.values():
+            if regions:
+                preprocess.ocr_regions(array, model.image_to_data)
+            else:
+                model.image_to_data(array)
+    if regions:
+        ctx.extra['regions'] = {name: len(preprocess.text_regions(array)) for name, array in arrays.items()}
+        # Words of the whole page OCR that region OCR does not find
+        ctx.extra['missed_words'] = {
+            name: len(set(words(model.image_to_data(array))) - set(words(preprocess.ocr_regions(array, model.image_to_data))))
+            for name, array in arrays.items()}
+
+@benchmark
+def ocr_full_page(ctx):
+    ocr_pages(ctx, regions=False)
+
+
+@benchmark
+def ocr_text_regions(ctx):
+    ocr_pages(ctx, regions=True)
+
+
+def finalized_image(ctx, quality):
+    container = load_document(ctx.scanned_pdf)[0]
+    redact_lines(container, 2000)
+    with ctx.timed():
+        if quality == 'high':
+            result = container.finalized_image()
+        else:
+            result = container.finalized_image('JPEG', image_quality=50, scale=0.8)
+    ctx.extra['output_bytes'] = len(result) if isinstance(result, bytes) else len(result.tobytes())
+
+
+@benchmark
+def finalized_image_high(ctx):
+    finalized_image(ctx, 'high')
+
+
+@benchmark
+def finalized_image_low(ctx):
+    finalized_image(ctx, 'low')
+
+
+def finalized_colour_image(ctx, mode):
+    '''Burn 3000 rectangles into a colour page, which PDF pages with colour and imported images are.'''
+    container = model.ImageContainer(fixtures.scan_image(0).convert(mode), fixtures.PAGE_SIZE_PT)
+    redact_lines(container, 3000)
+    with ctx.timed():
+        result = container.finalized_image()
+    ctx.extra['mode'] = result.mode
+
+
+@benchmark
+def finalized_image_rgb(ctx):
+    finalized_colour_image(ctx, 'RGB')
+
+
+@benchmark
+def finalized_image_rgba(ctx):
+    finalized_colour_image(ctx, 'RGBA')
+
+
+def save_file(ctx, quality):
+    containers = load_document(ctx.scanned_pdf)
+    for container in containers:
+        redact_lines(container, 200)
+    output = os.path.join(ctx.workdir, f'saved_{quality}.pdf')
+    with ctx.timed():
+        save_document(containers, output, quality)
+    ctx.extra['output_bytes'] = os.path.getsize(output)
+
+
+@benchmark
+def save_file_high(ctx):
+    save_file(ctx, 'high')
+
+
+@benchmark
+def save_file_low(ctx):
+    save_file(ctx, 'low')
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_benchmark(name, workdir, pages, repeat):
+    '''Run one benchmark in this process and return its result entry.'''
+    ctx = Context(workdir, pages)
+    ctx.prepare()
+    try:
+        for _ in range(repeat):
+            BENCHMARKS[name](ctx)
+    except Skip as e:
+        return {'status': 'skipped', 'reason': str(e)}
+    result = {'status': 'ok', 'seconds': round(statistics.median(ctx.times), 6), 'min_seconds': round(min(ctx.times), 6),
+              'runs': len(ctx.times), 'peak_rss_mb': peak_rss_mb()}
+    result.update(ctx.extra)
+    return result
+
+
+def run_in_subprocess(name, workdir, pages, repeat):
+    command = [sys.executable, '-m', 'benchmarks.run', '--child', name, '--workdir', workdir, '-p', str(pages), '-r', str(repeat)]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'status': 'error', 'reason': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, threshold):
+    '''Print the change against a baseline and return the names of the benchmarks that got slower than threshold.'''
+    regressions = []
+    print(f"{'benchmark':<22}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, result in results['results'].items():
+        old = baseline['results'].get(name)
+        if result.get('status') != 'ok' or not old or old.get('status') != 'ok':
+            print(f"{name:<22}{'-':>12}{result.get('status', '-'):>12}")
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        flag = '  slower' if ratio > threshold else ''
+        print(f"{name:<22}{old['seconds']:>12.4f}{result['seconds']:>12.4f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Benchmark the CoverUP hot paths.')
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('-p', '--pages', type=int, default=10, help='pages of the generated documents (default: 10)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per benchmark, the median is reported (default: 3)')
+    parser.add_argument('-o', '--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as regression (default: 1.25)')
+    parser.add_argument('--workdir', help='directory for the generated documents (default: a temporary directory)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.child:
+        print(json.dumps(run_benchmark(args.child, args.workdir, args.pages, args.repeat)))
+        return 0
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    with tempfile.TemporaryDirectory(prefix='coverup-bench-') as temp_dir:
+        workdir = args.workdir or temp_dir
+        os.makedirs(workdir, exist_ok=True)
+        Context(workdir, args.pages).prepare()
+        results = {'meta': {'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': git_commit(), 'python': platform.python_version(),
+                            'platform': platform.platform(), 'cpus': os.cpu_count(), 'pages': args.pages, 'repeat': args.repeat},
+                   'results': {}}
+        for name in args.names or BENCHMARKS:
+            results['results'][name] = run_in_subprocess(name, workdir, args.pages, args.repeat)
+            print(f"{name}: {results['results'][name]}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
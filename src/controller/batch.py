@@ -0,0 +1,190 @@
+# Headless batch redaction. Nothing imported on this path may import Qt.
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.model.document import load_document, save_document
+from src.model.page_cache import PageCache
+from src.model.ocr_engine import OcrEngine
+from src.model.ocr_cache import OcrCache
+from src.model.patterns import PatternSet, read_pattern_file
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png')
+
+
+def parse_scope(scope, page_count):
+    '''Return the page indexes selected by a scope like "all" or "1,3-5".'''
+    if scope == 'all':
+        return list(range(page_count))
+    pages = set()
+    for part in scope.split(','):
+        first, _, last = part.strip().partition('-')
+        first = int(first)
+        last = int(last) if last else first
+        pages.update(range(max(first, 1) - 1, min(last, page_count)))
+    return sorted(pages)
+
+
+def read_patterns(patterns, patterns_file=None):
+    '''Return the search terms given on the command line and in patterns_file.'''
+    terms = list(patterns or [])
+    if patterns_file:
+        terms.extend(read_pattern_file(patterns_file))
+    return terms
+
+
+def expand_inputs(inputs):
+    '''Expand input globs to a sorted list of supported files.'''
+    files = set()
+    for pattern in inputs:
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                files.add(path)
+    return sorted(files)
+
+
+def output_path(input_path, output_dir=None, with_extension=False):
+    stem, extension = os.path.splitext(os.path.basename(input_path))
+    if with_extension:
+        stem = f"{stem}_{extension.lstrip('.')}"
+    return os.path.join(output_dir or os.path.dirname(input_path), f"{stem}_redacted.pdf")
+
+
+def _path_key(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+def output_paths(input_paths, output_dir=None):
+    '''Return a distinct output path for every input path.
+
+    Outputs are named <name>_redacted.pdf. In output_dir they keep their
+    directory relative to the inputs' common directory, so a/scan.pdf and
+    b/scan.pdf do not overwrite each other. Inputs that only differ in their
+    extension, like scan.pdf and scan.png, get it added to the name. Raises
+    ValueError if two outputs still collide, as with scan.pdf, scan.png and
+    scan_pdf.png.
+    '''
+    if output_dir and input_paths:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in input_paths])
+        directories = [os.path.normpath(os.path.join(output_dir, os.path.relpath(os.path.dirname(os.path.abspath(path)), base)))
+                       for path in input_paths]
+    else:
+        directories = [None] * len(input_paths)
+    outputs = [output_path(path, directory) for path, directory in zip(input_paths, directories)]
+    taken = Counter(_path_key(output) for output in outputs)
+    outputs = [output_path(path, directory, with_extension=taken[_path_key(output)] > 1)
+               for path, directory, output in zip(input_paths, directories, outputs)]
+
+    seen = {}
+    for path, output in zip(input_paths, outputs):
+        key = _path_key(output)
+        if key in seen:
+            raise ValueError(f"{seen[key]} and {path} would both be written to {output}")
+        seen[key] = path
+    return outputs
+
+
+def redact_file(input_path, output, terms, scope='all', fill='black', quality='high', ocr_cache=True, report_text=False):
+    '''Search and redact one file and return its report entry.
+
+    Matches are reported with page, pattern and box. Their text is what was
+    redacted, so it is only included with report_text.
+    '''
+    started = time.time()
+    report = {'input': input_path, 'output': output, 'matches': []}
+    try:
+        containers = load_document(input_path, PageCache())
+        report['pages'] = len(containers)
+        selected = parse_scope(scope, len(containers))
+        engine = OcrEngine(workers=1, cache=OcrCache() if ocr_cache else None)
+        for _ in engine.run([containers[i] for i in selected]):
+            pass
+        pattern_set = PatternSet(terms)
+        for i in selected:
+            container = containers[i]
+            for bbox, text, pattern in container.search_patterns(pattern_set):
+                container.draw_rectangle((bbox[0], bbox[1]), (bbox[2], bbox[3]), fill)
+                match = {'page': i + 1, 'pattern': pattern, 'bbox': list(bbox)}
+                if report_text:
+                    match['text'] = text
+                report['matches'].append(match)
+            container.clear_search_results()
+        save_document(containers, output, quality, workers=1)
+    except Exception as e:
+        report['error'] = f"{type(e).__name__}: {e}"
+    report['redactions'] = len(report['matches'])
+    report['seconds'] = round(time.time() - started, 3)
+    return report
+
+
+def log_report(report):
+    status = report.get('error', f"{report['redactions']} redaction(s)")
+    print(f"{report['input']}: {status}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='coverup-batch', description='Redact PDF, PNG and JPG files without the GUI.')
+    parser.add_argument('inputs', nargs='+', help='input files or glob patterns, e.g. "scans/**/*.pdf"')
+    parser.add_argument('-e', '--pattern', action='append', default=[], help='regex to redact, may be repeated')
+    parser.add_argument('-f', '--patterns-file', help='file with one regex per line, lines starting with # are ignored')
+    parser.add_argument('-s', '--scope', default='all', help='pages to search: "all" or a list like "1,3-5" (default: all)')
+    parser.add_argument('--fill', choices=('black', 'white'), default='black', help='colour of the redaction bars')
+    parser.add_argument('-q', '--quality', choices=('high', 'low'), default='high', help='output quality')
+    parser.add_argument('-o', '--output-dir', help='directory for redacted files (default: next to each input)')
+    parser.add_argument('-r', '--report', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help='files processed in parallel')
+    parser.add_argument('--no-ocr-cache', action='store_true', help='do not read or write the on-disk OCR cache')
+    parser.add_argument('--report-text', action='store_true', help='include the redacted text in the report')
+    return parser
+
+
+def main(argv=None):
+    multiprocessing.freeze_support()
+    args = build_parser().parse_args(argv)
+    terms = read_patterns(args.pattern, args.patterns_file)
+    if not terms:
+        print('coverup-batch: no patterns given, use --pattern or --patterns-file', file=sys.stderr)
+        return 2
+    files = expand_inputs(args.inputs)
+    try:
+        outputs = output_paths(files, args.output_dir)
+    except ValueError as e:
+        print(f"coverup-batch: {e}", file=sys.stderr)
+        return 2
+    for output in outputs:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    jobs = [(path, output, terms, args.scope, args.fill, args.quality, not args.no_ocr_cache, args.report_text)
+            for path, output in zip(files, outputs)]
+    reports = []
+    if args.workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            reports.append(redact_file(*job))
+            log_report(reports[-1])
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+            for future in as_completed([pool.submit(redact_file, *job) for job in jobs]):
+                reports.append(future.result())
+                log_report(reports[-1])
+    reports.sort(key=lambda report: report['input'])
+
+    result = {'files': reports,
+              'redactions': sum(report['redactions'] for report in reports),
+              'failed': sum(1 for report in reports if 'error' in report)}
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,57 @@
+import os
 import sys
-import pypdfium2 as pdfium
-from PIL import Image
-from fpdf import FPDF
-from datetime import datetime
+import functools
+import multiprocessing
 from PyQt6.QtWidgets import QApplication, QFileDialog, QGraphicsScene, QGraphicsRectItem, QMessageBox, QDialog, QVBoxLayout, QLabel, QRadioButton, QButtonGroup, QDialogButtonBox
-from PyQt6.QtGui import QPixmap, QImage, QColor, QBrush
-from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QPixmap, QColor, QBrush, QTransform
+from PyQt6.QtCore import Qt, QRectF, QPointF, QTimer, QEventLoop
 from src.view.view import MainWindow
+from src.view.tiled_page_item import TiledPageItem
+from src.view.qimage_bridge import PixmapCache, to_pixmap
 from src.model.model import ImageContainer
+from src.model.document import load_document, save_document
+from src.model.page_cache import PageCache
+from src.model.compact import CompressedPageStore
+from src.model import spill_store
+from src.model.prefetch import PagePrefetcher
+from src.model.ocr_engine import OcrEngine
+from src.model.ocr_cache import OcrCache
+from src.model.tiles import TilePyramid, needs_tiling
+from src.model.patterns import PatternSet
+from src.controller.search_job import SearchJob
+from src.model.session import SESSION_EXTENSION, SessionError, SourceNotFoundError, load_session, save_session
 
 class Controller:
     def __init__(self):
         self._images = []
+        self._source_path = None
+        # Pages evicted from the page cache are spilled to disk if enabled, otherwise compressed in memory
+        cold_store = spill_store.SpillStore() if spill_store.DEFAULT_MAX_BYTES else CompressedPageStore()
+        self._page_cache = PageCache(cold=cold_store)
+        self._prefetcher = PagePrefetcher()
+        self._ocr_engine = OcrEngine(cache=OcrCache())
+        self._search_job = None
+        self._search_matches = 0
         self._current_page = 0
         self._scene = QGraphicsScene()
+        # Retained scene in original image coordinates: the pixmap item persists
+        # and rectangle and highlight items are added or removed one at a time.
+        # Zooming only changes the view transform.
+        self._pixmap_item = self._scene.addPixmap(QPixmap())
+        self._pixmap_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+        self._page_pixmap = None
+        # Converted pixmaps by (page, scale), scale 1 being the full resolution page
+        self._pixmap_cache = PixmapCache()
+        # Very large pages are painted from a tile pyramid instead of the pixmap item
+        self._tiled_item = None
+        self._rect_items = {}  # rectangle id -> scene item
+        self._highlight_items = []
+        self._scene_page = None
+        # Sharp re-render at the final zoom level once zooming has been idle
+        self._sharpen_timer = QTimer()
+        self._sharpen_timer.setSingleShot(True)
+        self._sharpen_timer.setInterval(150)
+        self._sharpen_timer.timeout.connect(self._sharpen_view)
         self._edit_mode = 'draw'
         self._fill_color = 'black'
         self._output_quality = 'high'
@@ -27,6 +65,7 @@ class Controller:
         self._view.open_button.clicked.connect(self.open_file)
         self._view.save_button.clicked.connect(self.save_file)
         self._view.export_button.clicked.connect(self.export_page)
+        self._view.save_session_button.clicked.connect(self.save_session)
         self._view.undo_button.clicked.connect(self.undo)
         self._view.edit_mode_button.clicked.connect(self.toggle_edit_mode)
         self._view.delete_all_button.clicked.connect(self.delete_all)
@@ -40,6 +79,8 @@ class Controller:
         self._view.page_num_input.returnPressed.connect(self.go_to_page)
         self._view.search_input.returnPressed.connect(self.search_text)
         self._view.search_button.clicked.connect(self.search_text)
+        self._view.load_patterns_button.clicked.connect(self.load_patterns)
+        self._view.cancel_search_button.clicked.connect(self.cancel_search)
         self._view.redact_search_button.clicked.connect(self.redact_search_results)
         self._view.search_scope_combo.currentTextChanged.connect(self.update_search_scope)
 
@@ -48,67 +89,165 @@ class Controller:
             self._view,
             "Open file",
             "",
-            "All supported (*.pdf *.PDF *.jpg *.JPG *.png *.PNG);;PDF (*.pdf *.PDF);;Images (*.jpg *.JPG *.png *.PNG)",
+            f"All supported (*.pdf *.PDF *.jpg *.JPG *.png *.PNG *{SESSION_EXTENSION});;PDF (*.pdf *.PDF);;Images (*.jpg *.JPG *.png *.PNG);;CoverUP session (*{SESSION_EXTENSION})",
         )
         if filepath:
+            self._stop_search()
             self._view.progress_bar.setValue(0)
-            self._images = []
-            if filepath.lower().endswith('.pdf'):
-                pdf = pdfium.PdfDocument(filepath)
-                total_pages = len(pdf)
-                for i in range(total_pages):
-                    pil_image = pdf[i].render(scale=150/72).to_pil()
-                    self._images.append(ImageContainer(pil_image, pdf[i].get_size()))
-                    self._view.progress_bar.setValue(int((i + 1) * 100 / total_pages))
+            self._prefetcher.cancel()
+            self._page_cache.clear()
+            self._pixmap_cache.clear()
+            # Pages are rendered lazily through the page cache when first shown
+            if filepath.lower().endswith(SESSION_EXTENSION):
+                if not self._open_session(filepath):
+                    self._view.progress_bar.setValue(0)
+                    return
             else:
-                pil_image = Image.open(filepath)
-                width, height = pil_image.size
-                width_ppi=int(width/(150/72))
-                height_ppi=int(height/(150/72))
-                self._images.append(ImageContainer(pil_image, (width_ppi, height_ppi)))
-                self._view.progress_bar.setValue(100)
+                self._images = load_document(filepath, self._page_cache)
+                self._source_path = filepath
+            self._view.progress_bar.setValue(100)
 
             self._current_page = 0
             self.update_view()
             self._view.progress_bar.setValue(0)
 
+    def _open_session(self, filepath):
+        """Load a session, asking for its source document if it is not next to it. Returns True on success"""
+        source_path = None
+        while True:
+            try:
+                self._source_path, self._images = load_session(filepath, source_path, self._page_cache)
+                return True
+            except SourceNotFoundError as e:
+                source_path, _ = QFileDialog.getOpenFileName(
+                    self._view, f"Locate {e.name}", "", "All supported (*.pdf *.PDF *.jpg *.JPG *.png *.PNG)")
+                if not source_path:
+                    return False
+            except (SessionError, OSError) as e:
+                QMessageBox.critical(self._view, "Error", f"Failed to open session: {e}")
+                return False
+
+    def save_session(self):
+        """Save rectangles and OCR results so the work can be continued later or by someone else"""
+        if not self._images:
+            return
+        stem = os.path.splitext(self._source_path)[0] if self._source_path else ""
+        save_file_path, _ = QFileDialog.getSaveFileName(
+            self._view, "Save session", stem + SESSION_EXTENSION, f"CoverUP session (*{SESSION_EXTENSION})"
+        )
+        if save_file_path:
+            if not save_file_path.lower().endswith(SESSION_EXTENSION):
+                save_file_path += SESSION_EXTENSION
+            try:
+                save_session(self._images, save_file_path, self._source_path)
+            except OSError as e:
+                QMessageBox.critical(self._view, "Error", f"Failed to save session: {e}")
+
 
     def update_view(self):
         if not self._images:
             return
 
         image_container = self._images[self._current_page]
-        image_container.scale_image()
-        pil_image = image_container.scaled_image
-
-        qimage = QImage(pil_image.tobytes(), pil_image.width, pil_image.height, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimage)
+        if image_container is not self._scene_page:
+            self._show_page(image_container)
+            self._reset_items(image_container)
+            self._scene_page = image_container
 
-        self._scene.clear()
-        self._scene.addPixmap(pixmap)
+        scale = self._view_scale(image_container)
+        self._view.graphics_view.setTransform(QTransform.fromScale(scale, scale))
+        self._sharpen_timer.start()
 
-        for rect_data in image_container.rectangles:
-            start_point, end_point, color, _ = rect_data
-            factor = image_container.zoom_factor / 100
-            scaled_start = (start_point[0] * factor, start_point[1] * factor)
-            scaled_end = (end_point[0] * factor, end_point[1] * factor)
-            rect_item = QGraphicsRectItem(QRectF(scaled_start[0], scaled_start[1], scaled_end[0] - scaled_start[0], scaled_end[1] - scaled_start[1]))
-            rect_item.setBrush(QBrush(QColor(color)))
-            self._scene.addItem(rect_item)
-
-        # Highlight search results
-        for bbox, text in image_container.search_results:
-            factor = image_container.zoom_factor / 100
-            scaled_bbox = (bbox[0] * factor, bbox[1] * factor, bbox[2] * factor, bbox[3] * factor)
-            highlight_item = QGraphicsRectItem(QRectF(scaled_bbox[0], scaled_bbox[1], scaled_bbox[2] - scaled_bbox[0], scaled_bbox[3] - scaled_bbox[1]))
-            highlight_item.setBrush(QBrush(QColor(255, 255, 0, 100)))  # Semi-transparent yellow
-            highlight_item.setPen(QColor(255, 255, 0))  # Yellow border
-            self._scene.addItem(highlight_item)
-
-
-        self._view.graphics_view.fitInView(self._scene.itemsBoundingRect())
         self._view.page_num_input.setText(str(self._current_page + 1))
         self._view.total_pages_label.setText(f"/ {len(self._images)}")
+        self._prefetcher.schedule(self._images, self._current_page)
+
+    def _show_page(self, image_container):
+        '''Put the page image of image_container into the scene.'''
+        if self._tiled_item is not None:
+            self._scene.removeItem(self._tiled_item)
+            self._tiled_item = None
+        if needs_tiling(image_container):
+            self._page_pixmap = None
+            self._pixmap_item.setPixmap(QPixmap())
+            self._tiled_item = TiledPageItem(TilePyramid(image_container), to_pixmap, self._pixmap_cache)
+            self._tiled_item.setZValue(-1)
+            self._scene.addItem(self._tiled_item)
+            self._scene.setSceneRect(self._tiled_item.boundingRect())
+        else:
+            self._page_pixmap = self._pixmap_cache.get((image_container, 1), lambda: to_pixmap(image_container.image))
+            self._pixmap_item.setPixmap(self._page_pixmap)
+            self._scene.setSceneRect(QRectF(self._page_pixmap.rect()))
+        self._pixmap_item.setScale(1)
+
+    def _scaled_pixmap(self, image_container, scale):
+        return to_pixmap(image_container.scale_image(scale))
+
+    def _view_scale(self, image_container):
+        '''Screen pixels per image pixel: the page fitted into the view at 100% zoom.'''
+        viewport = self._view.graphics_view.viewport().size()
+        page = self._scene.sceneRect()
+        fit = min(viewport.width() / page.width(), viewport.height() / page.height())
+        return fit * image_container.zoom_factor / 100
+
+    def _sharpen_view(self):
+        '''Swap in a LANCZOS resampled pixmap that maps 1:1 to screen pixels at the current zoom.
+
+        While zooming the view scales the full resolution pixmap, which is fast
+        but aliases when shrinking. Enlarged pages keep the full resolution pixmap.
+        '''
+        if not self._images or self._scene_page is not self._images[self._current_page] or self._page_pixmap is None:
+            return
+        image_container = self._scene_page
+        scale = self._view_scale(image_container)
+        if scale < 1:
+            pixmap = self._pixmap_cache.get((image_container, scale), lambda: self._scaled_pixmap(image_container, scale))
+            self._pixmap_item.setPixmap(pixmap)
+            self._pixmap_item.setScale(self._page_pixmap.width() / pixmap.width())
+        elif self._pixmap_item.scale() != 1:
+            self._pixmap_item.setPixmap(self._page_pixmap)
+            self._pixmap_item.setScale(1)
+
+    def _scene_rect(self, start_point, end_point):
+        '''Return the scene rectangle of two corners in image coordinates.'''
+        return QRectF(QPointF(*start_point), QPointF(*end_point)).normalized()
+
+    def _add_rectangle_item(self, rect_data):
+        start_point, end_point, color, _ = rect_data
+        rect_item = QGraphicsRectItem(self._scene_rect(start_point, end_point))
+        rect_item.setBrush(QBrush(QColor(color)))
+        self._scene.addItem(rect_item)
+        self._rect_items[rect_data[3]] = rect_item
+
+    def _add_highlight_item(self, bbox):
+        highlight_item = QGraphicsRectItem(self._scene_rect(bbox[:2], bbox[2:]))
+        highlight_item.setBrush(QBrush(QColor(255, 255, 0, 100)))  # Semi-transparent yellow
+        highlight_item.setPen(QColor(255, 255, 0))  # Yellow border
+        self._scene.addItem(highlight_item)
+        self._highlight_items.append(highlight_item)
+
+    def _remove_items(self, items):
+        for item in (items.values() if isinstance(items, dict) else items):
+            self._scene.removeItem(item)
+        items.clear()
+
+    def _remove_rectangles(self, rect_ids):
+        '''Remove rectangles from the current page and their scene items.'''
+        self._images[self._current_page].remove_rectangles(rect_ids)
+        for rect_id in rect_ids:
+            self._scene.removeItem(self._rect_items.pop(rect_id))
+
+    def _reset_items(self, image_container):
+        '''Replace the rectangle and highlight items with those of image_container.'''
+        self._remove_items(self._rect_items)
+        for rect_data in image_container.rectangles:
+            self._add_rectangle_item(rect_data)
+        self._refresh_highlights(image_container)
+
+    def _refresh_highlights(self, image_container):
+        self._remove_items(self._highlight_items)
+        for result in image_container.search_results:
+            self._add_highlight_item(result.bbox)
 
     def draw_rectangle(self, start_point, end_point):
         if self._images and self._edit_mode == 'draw':
@@ -117,24 +256,25 @@ class Controller:
             start_scene = self._view.graphics_view.mapToScene(start_point)
             end_scene = self._view.graphics_view.mapToScene(end_point)
 
+            count = len(image_container.rectangles)
             image_container.draw_rectangle((start_scene.x(), start_scene.y()), (end_scene.x(), end_scene.y()), self._fill_color)
-            self.update_view()
+            if len(image_container.rectangles) > count:
+                self._add_rectangle_item(image_container.rectangles[-1])
 
     def erase_rectangle(self, pos):
         if self._images:
-            items = self._view.graphics_view.items(pos)
-            for item in items:
-                if isinstance(item, QGraphicsRectItem):
-                    # This is a bit of a hack, but it works for now. A better solution would be to store the rectangles in a way that they can be easily looked up.
-                    rect_to_remove = None
-                    for rect in self._images[self._current_page].rectangles:
-                        if item.rect().x() == rect[0][0] * (self._images[self._current_page].zoom_factor/100) and item.rect().y() == rect[0][1] * (self._images[self._current_page].zoom_factor/100):
-                            rect_to_remove = rect
-                            break
-                    if rect_to_remove:
-                        self._images[self._current_page].rectangles.remove(rect_to_remove)
-                    self.update_view()
-                    break
+            scene_pos = self._view.graphics_view.mapToScene(pos)
+            rect_id = self._images[self._current_page].rectangle_at((scene_pos.x(), scene_pos.y()))
+            if rect_id is not None:
+                self._remove_rectangles([rect_id])
+
+    def erase_region(self, start_point, end_point):
+        '''Erase all rectangles that intersect the region between two view positions.'''
+        if self._images:
+            start_scene = self._view.graphics_view.mapToScene(start_point)
+            end_scene = self._view.graphics_view.mapToScene(end_point)
+            rect_ids = self._images[self._current_page].rectangles_in((start_scene.x(), start_scene.y()), (end_scene.x(), end_scene.y()))
+            self._remove_rectangles(rect_ids)
 
     def save_file(self, export_current_page=False):
         if not self._images:
@@ -147,48 +287,26 @@ class Controller:
         if save_file_path:
             try:
                 self._view.progress_bar.setValue(0)
-                out_pdf = FPDF(unit="pt")
-                out_pdf.set_creator('CoverUp PDF')
-                # Note: fpdf2 doesn't have set_creation_date method, metadata is set differently
-
-                import tempfile
-                import os
-
                 if export_current_page:
-                    image_container = self._images[self._current_page]
-                    out_pdf.add_page()
-                    include_image = image_container.finalized_image() if self._output_quality == 'high' else image_container.finalized_image('JPEG', image_quality=75, scale=0.90)
-                    # Save PIL image to temp file for fpdf2
-                    if isinstance(include_image, Image.Image):
-                        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                            include_image.save(tmp_file, format='PNG')
-                            temp_path = tmp_file.name
-                        try:
-                            out_pdf.image(temp_path, x=0, y=0, w=out_pdf.w)
-                        finally:
-                            os.unlink(temp_path)
-                    else:
-                        out_pdf.image(include_image, x=0, y=0, w=out_pdf.w)
-                    self._view.progress_bar.setValue(100)
+                    containers = [self._images[self._current_page]]
+                    image_quality, scale = 75, 0.90
                 else:
-                    total_pages = len(self._images)
-                    for i, item in enumerate(self._images):
-                        out_pdf.add_page()
-                        include_image = item.finalized_image() if self._output_quality == 'high' else item.finalized_image('JPEG', image_quality=50, scale=0.80)
-                        # Save PIL image to temp file for fpdf2
-                        if isinstance(include_image, Image.Image):
-                            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                                include_image.save(tmp_file, format='PNG')
-                                temp_path = tmp_file.name
-                            try:
-                                out_pdf.image(temp_path, x=0, y=0, w=out_pdf.w)
-                            finally:
-                                os.unlink(temp_path)
-                        else:
-                            out_pdf.image(include_image, x=0, y=0, w=out_pdf.w)
-                        self._view.progress_bar.setValue(int((i + 1) * 100 / total_pages))
-
-                out_pdf.output(save_file_path)
+                    containers = self._images
+                    image_quality, scale = 50, 0.80
+                total_pages = len(containers)
+
+                def progress(done):
+                    self._view.progress_bar.setValue(int(done * 100 / total_pages))
+                    QApplication.processEvents(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+
+                # The progress bar is repainted during the export, but the
+                # window takes no input until it is done, so nothing can change
+                # the pages or start another export meanwhile
+                self._view.setEnabled(False)
+                try:
+                    save_document(containers, save_file_path, self._output_quality, image_quality, scale, progress=progress)
+                finally:
+                    self._view.setEnabled(True)
                 self._view.progress_bar.setValue(0)
             except Exception as e:
                 QMessageBox.critical(self._view, "Error", f"Failed to save PDF: {e}")
@@ -201,8 +319,11 @@ class Controller:
 
     def undo(self):
         if self._images:
-            self._images[self._current_page].undo()
-            self.update_view()
+            image_container = self._images[self._current_page]
+            if image_container.rectangles:
+                rect_id = image_container.rectangles[-1][3]
+                image_container.undo()
+                self._scene.removeItem(self._rect_items.pop(rect_id))
 
 
     def toggle_edit_mode(self):
@@ -215,7 +336,7 @@ class Controller:
             if reply == QMessageBox.StandardButton.Ok:
                 for image_container in self._images:
                     image_container.rectangles = []
-                self.update_view()
+                self._remove_items(self._rect_items)
 
 
     def toggle_color(self):
@@ -264,29 +385,104 @@ class Controller:
     def search_text(self):
         if not self._images:
             return
-
         search_term = self._view.search_input.text()
-        self._search_scope = self._view.search_scope_combo.currentText().lower().replace(' ', '')
+        if search_term:
+            self._run_search(lambda image_container: image_container.find_text(search_term))
+        else:
+            self._stop_search()
+            for image_container in self._search_containers():
+                image_container.clear_search_results()
+            self._show_search_summary(0)
+
+    def load_patterns(self):
+        """Search for all patterns of a pattern file, one regex per line"""
+        if not self._images:
+            return
+        filepath, _ = QFileDialog.getOpenFileName(self._view, "Load patterns", "", "Pattern files (*.txt);;All files (*)")
+        if not filepath:
+            return
+        try:
+            pattern_set = PatternSet.from_file(filepath)
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self._view, "Error", f"Failed to load patterns: {e}")
+            return
+        self._run_search(lambda image_container: image_container.find_patterns(pattern_set), f"{len(pattern_set)} pattern(s)")
 
-        total_matches = 0
+    def _search_containers(self):
+        self._search_scope = self._view.search_scope_combo.currentText().lower().replace(' ', '')
         if self._search_scope == 'currentpage':
-            matches = self._images[self._current_page].search_text(search_term)
-            total_matches = len(matches) if matches else 0
-            scope_text = "current page"
-        else:  # 'allpages'
-            for image_container in self._images:
-                matches = image_container.search_text(search_term)
-                if matches:
-                    total_matches += len(matches)
-            scope_text = "all pages"
-
-        # Update search results label
+            return [self._images[self._current_page]]
+        return self._images
+
+    def _run_search(self, match_page, description=None):
+        """Search the pages in the scope in the background, replacing a search that is still running"""
+        self._stop_search()
+        containers = self._search_containers()
+        for image_container in containers:
+            image_container.clear_search_results()
+        self._refresh_highlights(self._images[self._current_page])
+
+        # OCR runs in worker processes, pages are matched as they come back
+        job = SearchJob(self._ocr_engine, containers, match_page)
+        job.page_done.connect(functools.partial(self._search_page_done, job))
+        job.finished.connect(functools.partial(self._search_finished, job))
+        job.failed.connect(functools.partial(self._search_failed, job))
+        self._search_job = job
+        self._search_description = description
+        self._search_matches = 0
+        self._view.cancel_search_button.setEnabled(True)
+        self._view.search_results_label.setText("Searching...")
+        job.start()
+
+    def _search_page_done(self, job, done, image_container, results):
+        # Results of a cancelled or replaced search are dropped here, in the GUI thread
+        if job is not self._search_job:
+            return
+        image_container.search_results = results
+        self._search_matches += len(results)
+        self._view.progress_bar.setValue(int(done * 100 / len(job.containers)))
+        self._view.search_results_label.setText(
+            f"Found {self._search_matches} match(es) so far, {done} of {len(job.containers)} page(s) searched")
+        if image_container is self._scene_page:
+            self._refresh_highlights(image_container)
+
+    def _search_finished(self, job, total_matches):
+        if job is not self._search_job:
+            return
+        self._stop_search()
+        self._show_search_summary(total_matches, self._search_description)
+
+    def _search_failed(self, job, message):
+        if job is not self._search_job:
+            return
+        self._stop_search()
+        self._view.search_results_label.setText("Search failed")
+        QMessageBox.critical(self._view, "Error", f"Search failed: {message}")
+
+    def _stop_search(self):
+        """Cancel the running search, if any, and reset the search controls"""
+        if self._search_job is not None:
+            self._search_job.cancel()
+            self._search_job = None
+        self._view.cancel_search_button.setEnabled(False)
+        self._view.progress_bar.setValue(0)
+
+    def cancel_search(self):
+        if self._search_job is None:
+            return
+        self._stop_search()
+        self._view.search_results_label.setText(f"Search cancelled, found {self._search_matches} match(es)")
+
+    def _show_search_summary(self, total_matches, description=None):
+        scope_text = "current page" if self._search_scope == 'currentpage' else "all pages"
+        if description:
+            scope_text = f"{scope_text} for {description}"
         if total_matches > 0:
             self._view.search_results_label.setText(f"Found {total_matches} match(es) on {scope_text}")
         else:
             self._view.search_results_label.setText(f"No matches found on {scope_text}")
 
-        self.update_view()
+        self._refresh_highlights(self._images[self._current_page])
 
     def update_search_scope(self):
         """Update search scope when combo box changes"""
@@ -295,10 +491,13 @@ class Controller:
     def redact_search_results(self):
         if not self._images:
             return
+        self._stop_search()
 
+        current_container = self._images[self._current_page]
+        count = len(current_container.rectangles)
         total_redacted = 0
         for image_container in self._images:
-            for bbox, text in image_container.search_results:
+            for bbox, text, pattern in image_container.search_results:
                 # Convert bbox (x1,y1,x2,y2) to start and end points
                 start_point = (bbox[0], bbox[1])
                 end_point = (bbox[2], bbox[3])
@@ -307,12 +506,15 @@ class Controller:
             image_container.clear_search_results()
 
         self._view.search_results_label.setText(f"Redacted {total_redacted} text region(s)")
-        self.update_view()
+        for rect_data in current_container.rectangles[count:]:
+            self._add_rectangle_item(rect_data)
+        self._refresh_highlights(current_container)
 
 
 # SearchOptionsDialog class is no longer needed since we use a combo box instead
 
 def main():
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     controller = Controller()
     controller._view.show()
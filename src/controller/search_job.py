@@ -0,0 +1,65 @@
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class SearchJob(QObject):
+    '''Search pages in a background thread and report every page as it is done.
+
+    OCR runs through the OcrEngine, match_page is called on each container as
+    it comes back and must return its search results without storing them.
+    The results are handed over with page_done, which is delivered in the
+    thread the job was created in, so only that thread changes the
+    containers' search_results. After cancel() no further signals are emitted
+    and pages that were not started are dropped, but a page that is being
+    matched runs to its end.
+    '''
+
+    # pages done, container, search results of the page
+    page_done = pyqtSignal(int, object, object)
+    # total number of matches
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, ocr_engine, containers, match_page):
+        super().__init__()
+        self.containers = containers
+        self._ocr_engine = ocr_engine
+        self._match_page = match_page
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='coverup-search', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self, timeout=None):
+        '''Wait for the background thread to end. Returns False on timeout.'''
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        total_matches = 0
+        pages = self._ocr_engine.run(self.containers)
+        try:
+            for done, (_, container) in enumerate(pages, 1):
+                if self.cancelled:
+                    return
+                results = self._match_page(container)
+                total_matches += len(results)
+                if self.cancelled:
+                    return
+                self.page_done.emit(done, container, results)
+        except Exception as e:
+            if not self.cancelled:
+                self.failed.emit(str(e))
+            return
+        finally:
+            pages.close()
+        if not self.cancelled:
+            self.finished.emit(total_matches)
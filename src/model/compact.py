@@ -0,0 +1,134 @@
+import os
+import zlib
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from PIL import Image
+
+# Largest difference between a pixel's channels and its gray value that still counts as gray
+GRAY_TOLERANCE = 2
+
+# Memory budget for compressed pages evicted from the page cache,
+# overridable with COVERUP_COMPRESSED_CACHE_MB. 0 disables it
+DEFAULT_COMPRESSED_BYTES = int(os.environ.get('COVERUP_COMPRESSED_CACHE_MB', 256)) * 1024 * 1024
+
+
+def _is_bilevel(gray):
+    return cv2.countNonZero(cv2.inRange(gray, 1, 254)) == 0
+
+
+def _gray_image(gray):
+    '''Return a PIL image of a gray array, in mode 1 if it only has black and white pixels.'''
+    image = Image.fromarray(gray)
+    if _is_bilevel(gray):
+        return image.convert('1', dither=Image.Dither.NONE)
+    return image
+
+
+def _to_gray(array, code, rows=128):
+    '''Return the gray version of a colour array, or None if it has visible colour.
+
+    The array is checked in strips of rows, which keeps temporary buffers small
+    and stops at the first strip with colour.
+    '''
+    gray = np.empty(array.shape[:2], np.uint8)
+    for top in range(0, array.shape[0], rows):
+        strip, gray_strip = array[top:top + rows], gray[top:top + rows]
+        cv2.cvtColor(strip, code, dst=gray_strip)
+        if cv2.absdiff(strip, cv2.cvtColor(gray_strip, cv2.COLOR_GRAY2RGB)).max() > GRAY_TOLERANCE:
+            return None
+    return gray
+
+
+def compact_array(array, bgr=False):
+    '''Return a PIL image of an RGB (or BGR) array in the smallest mode that shows it unchanged.
+
+    Pages without colour become grayscale, and pages with only black and
+    white pixels bilevel. The image never shares memory with array.
+    '''
+    gray = _to_gray(array, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
+    if gray is not None:
+        return _gray_image(gray)
+    return Image.fromarray(cv2.cvtColor(array, cv2.COLOR_BGR2RGB) if bgr else array.copy())
+
+
+def compact_image(image):
+    '''Return image in mode L or 1 if that shows it unchanged, otherwise image itself.'''
+    if image.mode == 'L':
+        if _is_bilevel(np.asarray(image)):
+            return image.convert('1', dither=Image.Dither.NONE)
+        return image
+    if image.mode == 'RGB':
+        gray = _to_gray(np.asarray(image), cv2.COLOR_RGB2GRAY)
+        if gray is not None:
+            return _gray_image(gray)
+    return image
+
+
+def compress_image(image, level=1):
+    '''Return the pixels of image losslessly compressed. Bilevel images are packed to one bit per pixel first.'''
+    return image.mode, image.size, zlib.compress(image.tobytes(), level)
+
+
+def decompress_image(compressed):
+    mode, size, data = compressed
+    return Image.frombytes(mode, size, zlib.decompress(data))
+
+
+class CompressedPageStore:
+    '''Second tier of a PageCache that keeps evicted pages compressed in memory.
+
+    Pages that went off-screen are compressed losslessly instead of dropped,
+    and decompressing them is much cheaper than rendering them again. Entries
+    are keyed by owner like in the PageCache and the least recently used are
+    dropped when the store grows beyond max_bytes. Thread-safe.
+    '''
+
+    def __init__(self, max_bytes=DEFAULT_COMPRESSED_BYTES, level=1):
+        self.max_bytes = max_bytes
+        self.level = level
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, owner):
+        return owner in self._entries
+
+    def put(self, owner, image):
+        '''Store the page of owner. Pages that are stored already are kept as they are.'''
+        if owner in self._entries or not self.max_bytes:
+            return
+        compressed = compress_image(image, self.level)
+        size = len(compressed[2])
+        with self._lock:
+            if owner in self._entries or size > self.max_bytes:
+                return
+            self._entries[owner] = compressed
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, data) = self._entries.popitem(last=False)
+                self.current_bytes -= len(data)
+
+    def get(self, owner):
+        '''Return the decompressed page of owner, or None if it is not stored.'''
+        with self._lock:
+            compressed = self._entries.get(owner)
+            if compressed is None:
+                return None
+            self._entries.move_to_end(owner)
+        return decompress_image(compressed)
+
+    def discard(self, owner):
+        with self._lock:
+            compressed = self._entries.pop(owner, None)
+            if compressed is not None:
+                self.current_bytes -= len(compressed[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
@@ -0,0 +1,281 @@
+import os
+import math
+import ctypes
+import threading
+import multiprocessing
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from PIL import Image
+from src.model.model import ImageContainer
+from src.model.pdf_writer import PdfWriter, encode_image
+from src.model.compact import compact_array, compact_image
+from src.model.instrumentation import span, traced
+
+# Pages are rasterized at 150 dpi
+RENDER_SCALE = 150/72
+
+# Number of export worker processes, overridable with COVERUP_EXPORT_WORKERS
+EXPORT_WORKERS = int(os.environ.get('COVERUP_EXPORT_WORKERS', 0)) or os.cpu_count() or 1
+
+# Exports with fewer pages are finalized in this process, handing pages to
+# the export workers costs more than it saves on them. Overridable with
+# COVERUP_PARALLEL_EXPORT_PAGES
+PARALLEL_EXPORT_PAGES = int(os.environ.get('COVERUP_PARALLEL_EXPORT_PAGES', 8))
+
+# pdfium is not thread-safe, all calls into it have to hold this lock
+PDFIUM_LOCK = threading.RLock()
+
+# Set COVERUP_FORCE_OCR=1 to OCR every page, even those with a text layer
+FORCE_OCR = os.environ.get('COVERUP_FORCE_OCR', '0') != '0'
+
+# An image covering at least this fraction of the page is a scan of it, and
+# the whole page is OCRed unless the text layer covers the image
+MIN_SCAN_AREA = 0.8
+
+# Images smaller than this fraction of the page, like logos, do not need OCR
+MIN_IMAGE_AREA = 0.05
+
+# Fraction of an image's area the words on it have to cover for the text
+# layer to count as its OCR. Scanned pages with an OCR layer are well above
+# it, a stamp or page number added on top of a scan is far below
+MIN_TEXT_COVERAGE = 0.05
+
+# Embedded text of a page as Tesseract style word data, and the boxes of the
+# images on the page that the text does not cover and still need OCR
+TextLayer = namedtuple('TextLayer', ['words', 'ocr_boxes'])
+
+
+def _area(box):
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+def uncovered_images(data, image_boxes, page_box):
+    '''Return the boxes of the images on a page that the words of Tesseract style data do not account for.
+
+    An image is accounted for when word boxes cover MIN_TEXT_COVERAGE of its
+    area. Images smaller than MIN_IMAGE_AREA of the page are ignored. The
+    boxes are clipped to the page.
+    '''
+    words = list(zip(data['left'], data['top'], data['width'], data['height']))
+    uncovered = []
+    for image_box in image_boxes:
+        left, top = max(image_box[0], page_box[0]), max(image_box[1], page_box[1])
+        right, bottom = min(image_box[2], page_box[2]), min(image_box[3], page_box[3])
+        image_area = _area((left, top, right, bottom))
+        if image_area < MIN_IMAGE_AREA * _area(page_box):
+            continue
+        covered = sum(_area((max(x, left), max(y, top), min(x + w, right), min(y + h, bottom)))
+                      for x, y, w, h in words)
+        if covered < MIN_TEXT_COVERAGE * image_area:
+            uncovered.append((left, top, right, bottom))
+    return uncovered
+
+
+class PdfPageLoader:
+    '''Render one page of an open PDF document on demand.
+
+    Pages without colour are returned in mode L, black and white pages in mode 1.
+    '''
+
+    def __init__(self, pdf, index, scale=RENDER_SCALE):
+        self.pdf = pdf
+        self.index = index
+        self.scale = scale
+
+    def __call__(self):
+        with PDFIUM_LOCK, span('render', page=self.index):
+            bitmap = self.pdf[self.index].render(scale=self.scale)
+            try:
+                if bitmap.mode == 'BGR':
+                    return compact_array(bitmap.to_numpy(), bgr=True)
+                return compact_image(bitmap.to_pil())
+            finally:
+                bitmap.close()
+
+    @traced('text_layer')
+    def text_layer(self):
+        '''Return the page's embedded text as a TextLayer, or None if the whole page needs OCR.
+
+        Words are split at whitespace and lines at the line breaks pdfium
+        reports. Boxes are mapped to the pixels of the rendered page, so they
+        can be used like OCR results. Pages without text need OCR, and so do
+        scans, images of at least MIN_SCAN_AREA of the page, that the text
+        does not cover. Smaller images without text on them, like a chart or
+        a letterhead, are left to OCR in TextLayer.ocr_boxes, see
+        uncovered_images().
+        '''
+        data = {key: [] for key in ('text', 'left', 'top', 'width', 'height', 'block_num', 'par_num', 'line_num')}
+        with PDFIUM_LOCK:
+            page = self.pdf[self.index]
+            width, height = math.ceil(page.get_width() * self.scale), math.ceil(page.get_height() * self.scale)
+            device_x, device_y = ctypes.c_int(), ctypes.c_int()
+
+            def to_device(x, y):
+                pdfium_c.FPDF_PageToDevice(page.raw, 0, 0, width, height, 0, x, y, device_x, device_y)
+                return device_x.value, device_y.value
+
+            textpage = page.get_textpage()
+            try:
+                line_num, new_line = 1, False
+                chars, box = [], None
+                for i in range(textpage.count_chars()):
+                    code = pdfium_c.FPDFText_GetUnicode(textpage.raw, i)
+                    char = chr(code) if code else ' '
+                    if char.isspace():
+                        if chars and box:
+                            self._add_word(data, ''.join(chars), box, line_num)
+                        chars, box = [], None
+                        new_line = new_line or char in '\r\n'
+                        continue
+                    if new_line and data['text']:
+                        line_num += 1
+                    new_line = False
+                    chars.append(char)
+                    left, bottom, right, top = textpage.get_charbox(i)
+                    if right > left and top > bottom:
+                        (x0, y0), (x1, y1) = to_device(left, top), to_device(right, bottom)
+                        char_box = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+                        box = char_box if box is None else (min(box[0], char_box[0]), min(box[1], char_box[1]),
+                                                            max(box[2], char_box[2]), max(box[3], char_box[3]))
+                if chars and box:
+                    self._add_word(data, ''.join(chars), box, line_num)
+            finally:
+                textpage.close()
+            if not data['text']:
+                return None
+
+            image_boxes = []
+            for image in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]):
+                left, bottom, right, top = image.get_bounds()
+                (x0, y0), (x1, y1) = to_device(left, top), to_device(right, bottom)
+                image_boxes.append((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+        ocr_boxes = uncovered_images(data, image_boxes, (0, 0, width, height))
+        if any(_area(box) >= MIN_SCAN_AREA * width * height for box in ocr_boxes):
+            return None
+        return TextLayer(data, ocr_boxes)
+
+    @staticmethod
+    def _add_word(data, text, box, line_num):
+        data['text'].append(text)
+        data['left'].append(box[0])
+        data['top'].append(box[1])
+        data['width'].append(box[2] - box[0])
+        data['height'].append(box[3] - box[1])
+        data['block_num'].append(1)
+        data['par_num'].append(1)
+        data['line_num'].append(line_num)
+
+
+def load_document(filepath, page_cache=None):
+    '''Return a list of ImageContainers for a PDF, PNG or JPG file.
+
+    PDF pages are not rendered here. Each container gets a loader and renders
+    its bitmap through page_cache the first time it is needed. Search uses a
+    page's embedded text layer when it has one, and OCR only for the images it
+    does not cover, unless FORCE_OCR is set. Pages without colour are kept in
+    grayscale or bilevel mode.
+    '''
+    if filepath.lower().endswith('.pdf'):
+        with PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(filepath)
+            loaders = [PdfPageLoader(pdf, i) for i in range(len(pdf))]
+            return [ImageContainer(None, pdf.get_page_size(i), loader=loader, cache=page_cache,
+                                   text_layer=None if FORCE_OCR else loader.text_layer)
+                    for i, loader in enumerate(loaders)]
+
+    pil_image = compact_image(Image.open(filepath))
+    width, height = pil_image.size
+    width_ppi=int(width/RENDER_SCALE)
+    height_ppi=int(height/RENDER_SCALE)
+    return [ImageContainer(pil_image, (width_ppi, height_ppi))]
+
+
+def page_size(container):
+    '''Return the output page size of a container in points.'''
+    if container.width_in_pt and container.height_in_pt:
+        return container.width_in_pt, container.height_in_pt
+    width, height = container.image.size
+    return width / RENDER_SCALE, height / RENDER_SCALE
+
+
+def finalize_page(image, rectangles, quality='high', image_quality=50, scale=0.80):
+    '''Burn rectangles into a page image and encode it for the PDF. Runs in export workers.'''
+    container = ImageContainer(image, rectangles=rectangles)
+    if quality == 'high':
+        return encode_image(container.finalized_image())
+    return encode_image(container.finalized_image('JPEG', image_quality=image_quality, scale=scale))
+
+
+_export_pool = None  # (workers, ProcessPoolExecutor), kept between exports
+_export_pool_lock = threading.Lock()
+
+
+def export_pool(workers):
+    '''Return a pool of export worker processes.
+
+    The pool is started on first use and kept for later exports, so only the
+    first export pays for starting the workers.
+    '''
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is None or _export_pool[0] != workers:
+            if _export_pool is not None:
+                _export_pool[1].shutdown(wait=False)
+            # Forking a process that runs a Qt event loop is unsafe
+            context = multiprocessing.get_context('spawn')
+            _export_pool = (workers, ProcessPoolExecutor(max_workers=workers, mp_context=context))
+        return _export_pool[1]
+
+
+def shutdown_export_pool():
+    '''Stop the export worker processes.'''
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is not None:
+            _export_pool[1].shutdown(wait=False)
+            _export_pool = None
+
+
+def save_document(containers, filepath, quality='high', image_quality=50, scale=0.80, progress=None, workers=EXPORT_WORKERS):
+    '''Write the redacted pages of containers to a PDF file.
+
+    High quality pages are embedded losslessly, low quality pages as JPEG with
+    image_quality and scale. Documents of at least PARALLEL_EXPORT_PAGES pages
+    are finalized and encoded in the export_pool() and written in page order
+    as soon as they are done, with at most two pages per worker in flight.
+    progress is called with the number of pages written so far.
+    '''
+    with span('save', pages=len(containers), quality=quality), PdfWriter(filepath) as writer:
+        if workers <= 1 or len(containers) < PARALLEL_EXPORT_PAGES:
+            for i, container in enumerate(containers):
+                writer.add_page(finalize_page(container.image, container.rectangles, quality, image_quality, scale), *page_size(container))
+                if progress:
+                    progress(i + 1)
+            return
+
+        pool = export_pool(workers)
+        pending = deque()
+
+        def write_oldest():
+            container, future = pending.popleft()
+            writer.add_page(future.result(), *page_size(container))
+            if progress:
+                progress(len(writer))
+
+        try:
+            for container in containers:
+                future = pool.submit(finalize_page, container.image, container.rectangles, quality, image_quality, scale)
+                pending.append((container, future))
+                if len(pending) >= workers * 2:
+                    write_oldest()
+            while pending:
+                write_oldest()
+        except BrokenProcessPool:
+            shutdown_export_pool()
+            raise
+        finally:
+            for _, future in pending:
+                future.cancel()
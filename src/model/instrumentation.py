@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import atexit
+import logging
+import functools
+import threading
+import multiprocessing
+from contextlib import contextmanager, nullcontext
+
+# Timing of the hot paths, off unless COVERUP_TRACE is set:
+#   COVERUP_TRACE=trace.json  write a Chrome trace, viewable in chrome://tracing or ui.perfetto.dev
+#   COVERUP_TRACE=log         log every span, and the totals at exit, to the coverup.trace logger
+TRACE = os.environ.get('COVERUP_TRACE', '')
+
+logger = logging.getLogger('coverup.trace')
+
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    '''Records timed spans and counters of this process.
+
+    With a path, events are appended to a Chrome trace file in the JSON array
+    format, one line per event. Worker processes open the same file with
+    truncate=False and append their events to it. The closing bracket is left
+    out, which trace viewers accept. Without a path, spans are logged. The
+    number of calls and total time of every span are kept in totals.
+    '''
+
+    def __init__(self, path=None, truncate=True):
+        self.path = path
+        self.totals = {}  # span name -> [calls, seconds]
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._fd = None
+        if path is not None:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (os.O_TRUNC if truncate else 0)
+            self._fd = os.open(path, flags, 0o644)
+            if truncate:
+                os.write(self._fd, b'[\n')
+            self._event({'ph': 'M', 'name': 'process_name', 'args': {'name': multiprocessing.current_process().name}})
+
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter_ns() - start, args)
+
+    def count(self, name, value=1):
+        with self._lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+        if self.path is not None:
+            self._event({'ph': 'C', 'name': name, 'ts': time.perf_counter_ns() / 1000, 'args': {name: total}})
+
+    def _record(self, name, start, duration, args):
+        with self._lock:
+            total = self.totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += duration / 1e9
+        if self.path is None:
+            details = ''.join(f" {key}={value}" for key, value in args.items())
+            logger.info('span=%s ms=%.3f%s', name, duration / 1e6, details)
+        else:
+            self._event({'ph': 'X', 'name': name, 'ts': start / 1000, 'dur': duration / 1000,
+                         'tid': threading.get_native_id(), 'args': args})
+
+    def _event(self, event):
+        event['pid'] = os.getpid()
+        line = json.dumps(event, default=str).encode() + b',\n'
+        with self._lock:
+            if self._fd is not None:
+                # A single write per event, so lines of several processes do not interleave
+                os.write(self._fd, line)
+
+    def summary(self):
+        '''Log the calls and total time of every span and the counter totals.'''
+        for name, (calls, seconds) in sorted(self.totals.items()):
+            logger.info('total span=%s calls=%d ms=%.1f', name, calls, seconds * 1000)
+        for name, value in sorted(self.counters.items()):
+            logger.info('total counter=%s value=%d', name, value)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def _tracer_from_environment(value):
+    if not value or value == '0':
+        return None
+    if value == 'log':
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(processName)s %(threadName)s %(message)s'))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        tracer = Tracer()
+        atexit.register(tracer.summary)
+        return tracer
+    # Worker processes inherit the setting and append to the file of the main process
+    tracer = Tracer(os.path.abspath(value), truncate=multiprocessing.parent_process() is None)
+    atexit.register(tracer.close)
+    return tracer
+
+
+TRACER = _tracer_from_environment(TRACE)
+
+
+def span(name, **args):
+    '''Context manager timing the block as name, with args recorded alongside.'''
+    if TRACER is None:
+        return _NO_SPAN
+    return TRACER.span(name, **args)
+
+
+def count(name, value=1):
+    '''Add value to the counter name.'''
+    if TRACER is not None:
+        TRACER.count(name, value)
+
+
+def traced(name):
+    '''Decorator timing every call of a function as name. The function is returned as is when tracing is off.'''
+    def decorate(function):
+        if TRACER is None:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
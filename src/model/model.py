@@ -1,33 +1,203 @@
-import pytesseract
+import os
 import cv2
+import logging
+import threading
 import numpy as np
-import re
 from PIL import Image, ImageDraw
 import io
+from src.model.spatial_index import GridIndex
+from src.model.rect_store import RectangleStore
+from src.model.text_index import TextIndex
+from src.model.patterns import compile_pattern
+from src.model import preprocess
+from src.model.ocr_backend import get_backend
+from src.model.instrumentation import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Tesseract options, also part of the OCR cache key
+TESSERACT_LANG = 'eng'
+TESSERACT_CONFIG = ''
+
+# Set COVERUP_OCR_REGIONS=1 to OCR only the detected text regions of a page.
+# Off until the ocr_text_regions benchmark shows it is faster than
+# ocr_full_page and misses no words. Also part of the OCR cache key
+OCR_REGIONS = os.environ.get('COVERUP_OCR_REGIONS', '0') != '0'
+
+
+def ocr_array(image):
+    '''Convert a PIL image to the OpenCV array that is passed to Tesseract.'''
+    if image.mode == '1':
+        image = image.convert('L')
+    if image.mode == 'L':
+        return np.array(image)
+    return cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+
+def image_to_data(array):
+    '''Run Tesseract on an OpenCV image and return the word level data dict.'''
+    return get_backend(TESSERACT_LANG, TESSERACT_CONFIG).image_to_data(array)
+
+
+def image_to_string(array):
+    '''Run Tesseract on an OpenCV image and return its text.'''
+    return get_backend(TESSERACT_LANG, TESSERACT_CONFIG).image_to_string(array)
+
+
+@traced('ocr')
+def ocr_page(array, boxes=None):
+    '''Return the word level data dict of a page.
+
+    With boxes only those (x0, y0, x1, y1) parts of the page are recognized,
+    otherwise only its text regions if OCR_REGIONS is set.
+    '''
+    if boxes:
+        return preprocess.ocr_boxes(array, boxes, image_to_data)
+    if OCR_REGIONS:
+        return preprocess.ocr_regions(array, image_to_data)
+    return image_to_data(array)
+
+
+def merge_word_data(data, other):
+    '''Return word data with the words of other after those of data, in blocks of their own.
+
+    The keys of data are kept, values other does not have are 0.
+    '''
+    block_offset = max(data.get('block_num', ()), default=0)
+    merged = {}
+    for key in data:
+        values = other.get(key, [0] * len(other['text']))
+        if key == 'block_num':
+            values = [number + block_offset if number else number for number in values]
+        merged[key] = list(data[key]) + list(values)
+    return merged
+
 
 class ImageContainer:
-    '''Container for images of PDF pages'''
+    '''Container for images of PDF pages
 
-    def __init__(self, image, size=(0,0), rectangles = None):
-        self.image = image
+    Either holds the page image directly or a loader that renders it on demand.
+    Rendered pages are kept in a shared PageCache and may be evicted at any time.
+    text_layer is an optional callable returning the page's embedded text as
+    a TextLayer, which is used for search instead of OCR. Images on the page
+    that the text layer does not cover are OCRed and their words added to it.
+    OCR data and the text index may be built from a background thread.
+    '''
+
+    def __init__(self, image, size=(0,0), rectangles = None, loader=None, cache=None, text_layer=None):
+        self._image = image
+        self._loader = loader
+        self._cache = cache
+        self._text_layer = text_layer
         self.size = size
         self.width_in_pt = size[0]
         self.height_in_pt = size[1]
-        self.scaled_image = self.image
+        self._scaled = None  # (scale, image), replaced as a whole so threads see a consistent pair
         self.zoom_factor = 100
-        self.search_results = []  # List of (bbox, text) tuples for search results
+        self.search_results = []  # List of SearchResult(bbox, text, pattern) for search results
+        self._ocr_lock = threading.RLock()
         self.ocr_data = None  # Cached OCR data for performance
+        self._text_words = None  # Text layer words waiting for the OCR of ocr_boxes
+        self.ocr_boxes = None  # Parts of the page OCR has to recognize, None for all of it
 
-        #list of rectangles [[start_cords, end_coords, color, id], ...]
+        #store of rectangles [[start_cords, end_coords, color, id], ...]
+        self._next_rect_id = 1
+        self._index = None  # GridIndex, built on the first hit test
         self.rectangles = list() if rectangles == None else rectangles
 
+    @property
+    def rectangles(self):
+        '''RectangleStore of the page. Behaves like a list of rectangle tuples.'''
+        return self._rectangles
+
+    @rectangles.setter
+    def rectangles(self, rectangles):
+        '''Replace all rectangles. Rectangles without an id get one.'''
+        if isinstance(rectangles, RectangleStore):
+            self._rectangles = rectangles.copy()
+            if len(rectangles):
+                self._next_rect_id = max(self._next_rect_id, int(rectangles.ids.max()) + 1)
+        else:
+            self._rectangles = RectangleStore()
+            for start_point, end_point, fill, rect_id in rectangles:
+                self._add_rectangle(start_point, end_point, fill, rect_id)
+        self._index = None
+
+    @property
+    def index(self):
+        '''GridIndex of the rectangles, built when it is first needed.'''
+        if self._index is None:
+            self._index = GridIndex()
+            for (x0, y0, x1, y1), rect_id in zip(self.rectangles.boxes.tolist(), self.rectangles.ids.tolist()):
+                self._index.insert(rect_id, (x0, y0, x1, y1))
+        return self._index
+
+    def _add_rectangle(self, start_point, end_point, fill, rect_id=None):
+        '''Append a rectangle with normalized corners and register it in the spatial index.'''
+        x0, x1 = sorted((start_point[0], end_point[0]))
+        y0, y1 = sorted((start_point[1], end_point[1]))
+        if rect_id is None:
+            rect_id = self._next_rect_id
+        self._next_rect_id = max(self._next_rect_id, rect_id + 1)
+        self._rectangles.append(((x0, y0), (x1, y1), fill, rect_id))
+        if self._index is not None:
+            self._index.insert(rect_id, (x0, y0, x1, y1))
+        return rect_id
+
+    def rectangle_at(self, point):
+        '''Return the id of the topmost rectangle containing point or None.'''
+        ids = self.index.at(*point)
+        return ids[-1] if ids else None
+
+    def rectangles_in(self, start_point, end_point):
+        '''Return the ids of all rectangles intersecting the region between two corners.'''
+        x0, x1 = sorted((start_point[0], end_point[0]))
+        y0, y1 = sorted((start_point[1], end_point[1]))
+        return self.index.intersecting((x0, y0, x1, y1))
+
+    def remove_rectangles(self, rect_ids):
+        '''Remove the rectangles with the given ids.'''
+        rect_ids = set(rect_ids)
+        if self._index is not None:
+            for rect_id in rect_ids:
+                self._index.remove(rect_id)
+        self._rectangles.remove_ids(rect_ids)
+        return self
+
+    @property
+    def image(self):
+        '''Full resolution image of the page, rendered by the loader if necessary.'''
+        if self._image is not None:
+            return self._image
+        if self._cache is None:
+            return self._loader()
+        return self._cache.get(self, self._loader)
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+        self._scaled = None
+
+    @property
+    def scaled_image(self):
+        '''Image made by the last scale_image() call, or None if it was released.'''
+        scaled = self._scaled
+        return scaled[1] if scaled is not None else None
+
+    def release(self):
+        '''Drop images derived from the rendered page.
+
+        Called on cache eviction, which may happen on a prefetch thread while
+        another thread shows the page. Use the image returned by scale_image()
+        rather than reading scaled_image afterwards.
+        '''
+        self._scaled = None
+
     def increase_zoom(self, number=20):
         '''Zoom in image. Returns new zoom_factor'''
         self.zoom_factor += number
         if self.zoom_factor > 240:
             self.zoom_factor = 240
-        else:
-            self.scale_image()
         return [self.zoom_factor]
 
     def decrease_zoom(self, number=20):
@@ -35,30 +205,46 @@ class ImageContainer:
         self.zoom_factor -= number
         if self.zoom_factor < 20:
             self.zoom_factor = 20
-        else:self.scale_image()
         return [self.zoom_factor]
 
-    def scale_image(self):
-        '''Scale original size image for display in Graph element.'''
-        width, height = self.image.size
-        newwidth = int(width * self.zoom_factor / 100)
-        newheight = int(height * self.zoom_factor / 100)
-        self.scaled_image = self.image.resize((newwidth, newheight), resample=Image.LANCZOS)
+    def scale_image(self, scale=None):
+        '''Scale original size image for display in Graph element and return it. Defaults to the zoom factor.'''
+        if scale is None:
+            scale = self.zoom_factor / 100
+        scaled = self._scaled
+        if scaled is not None and scaled[0] == scale:
+            return scaled[1]
+        image = self.image
+        width, height = image.size
+        newwidth = max(1, int(width * scale))
+        newheight = max(1, int(height * scale))
+        with span('scale', scale=scale):
+            # PIL only resamples bilevel images with nearest neighbour
+            source = image.convert('L') if image.mode == '1' else image
+            scaled_image = source.resize((newwidth, newheight), resample=Image.LANCZOS)
+        self._scaled = (scale, scaled_image)
+        return scaled_image
 
     def undo(self):
         '''Go back in history. Remove last rectangle and redraw rectangles.'''
         if len(self.rectangles)>0:
-            self.rectangles.pop()
+            rect_id = self.rectangles.pop()[3]
+            if self._index is not None:
+                self._index.remove(rect_id)
         return self
 
     def data(self):
         '''Return bytes of scaled image.'''
+        scaled_image = self.scaled_image
+        if scaled_image is None:
+            scaled_image = self.scale_image()
         with io.BytesIO() as output:
-            self.scaled_image.save(output, format='PNG')
+            scaled_image.save(output, format='PNG')
             data = output.getvalue()
             self.datacache = data
             return data
 
+    @traced('encode_jpeg')
     def jpg(self, image=None, image_quality=85, scale=1):
         '''Return bytes of compressed image'''
         with io.BytesIO() as output:
@@ -72,78 +258,125 @@ class ImageContainer:
         self.scale_image()
         return self
 
+    def load(self):
+        '''Make sure the page is rendered and return self'''
+        self.image
+        return self
+
+    @traced('finalize')
     def finalized_image (self, format='PIL', image_quality=100, scale=1):
         '''Return a copy of the imported image with all the rectangles and in the requested format.'''
-        final_image = self.draw_rectangles_on_image(self.image.copy())
+        image = self.image
         if format in ('JPEG','JPG'):
-            return self.jpg(final_image.convert('RGB'), image_quality, scale)
+            mode = 'L' if image.mode in ('1', 'L') else 'RGB'
+            return self.jpg(self.draw_rectangles_on_image(image, mode), image_quality, scale)
         else:
-            return final_image
+            return self.draw_rectangles_on_image(image)
+
+    def draw_rectangles_on_image(self, image, mode=None):
+        '''Return a copy of image in mode, by default its own, with the rectangles in self.rectangles filled in.
 
-    def draw_rectangles_on_image(self, image):
-        '''Draw the rectangles in self.rectangles on image'''
-        draw = ImageDraw.Draw(image)
-        for rectangle in self.rectangles:
-            draw.rectangle(xy=[rectangle[0],rectangle[1]], fill=rectangle[2])
-        return image
+        The page is copied or converted once and the rectangles are drawn into
+        that copy in drawing order.
+        '''
+        burned = image.copy() if mode is None or mode == image.mode else image.convert(mode)
+        draw = ImageDraw.Draw(burned)
+        colors = self.rectangles.colors
+        for (x0, y0, x1, y1), code in zip(self.rectangles.boxes.tolist(), self.rectangles.codes.tolist()):
+            draw.rectangle(xy=[x0, y0, x1, y1], fill=colors[code])
+        return burned
 
     def draw_rectangle(self, start_point, end_point, fill='black'):
-        '''Draw a rectangle on graph and add it to the rectangles list'''
+        '''Add a rectangle to the rectangles list. Points are in original image coordinates,
+        zooming is done by the view and does not affect them.'''
         try:
-            factor=self.zoom_factor/100
+            computed_startpoint_x = int(start_point[0])
+            computed_startpoint_y = int(start_point[1])
 
-            computed_startpoint_x = int((start_point[0]) / factor)
-            computed_startpoint_y = int((start_point[1]) / factor)
-
-            computed_endpoint_x = int((end_point[0]) / factor)
-            computed_endpoint_y = int((end_point[1]) / factor)
+            computed_endpoint_x = int(end_point[0])
+            computed_endpoint_y = int(end_point[1])
 
             start_point_in_original = (computed_startpoint_x ,computed_startpoint_y)
             end_point_in_original = (computed_endpoint_x ,computed_endpoint_y )
 
-            self.rectangles.append((start_point_in_original, end_point_in_original, fill, None))
+            self._add_rectangle(start_point_in_original, end_point_in_original, fill)
 
         except ValueError:
             pass
         return self
 
-    def search_text(self, search_term):
-        '''Search for text in the image using OCR and return bounding boxes'''
-        self.search_results = []
+    def load_text_layer(self):
+        '''Use the embedded text layer as OCR data if there is one. Returns True if the page has OCR data.
+
+        If the text layer leaves images uncovered, it is kept until
+        add_ocr_data() gets the OCR of ocr_boxes, and the page has no OCR
+        data yet.
+        '''
+        with self._ocr_lock:
+            if self.ocr_data is None and self._text_layer is not None:
+                layer = self._text_layer()
+                self._text_layer = None
+                if layer is not None and layer.ocr_boxes:
+                    self._text_words, self.ocr_boxes = layer
+                elif layer is not None:
+                    self.ocr_data = layer.words
+            return self.ocr_data is not None
+
+    def add_ocr_data(self, data):
+        '''Store Tesseract output of ocr_boxes, or of the whole page, as the page's OCR data.'''
+        with self._ocr_lock:
+            if self._text_words is not None:
+                data = merge_word_data(self._text_words, data)
+            self.ocr_data = data
+
+    def run_ocr(self):
+        '''Return the OCR data of the page, running Tesseract if it is not cached yet and there is no text layer.'''
+        with self._ocr_lock:
+            if not self.load_text_layer():
+                self.add_ocr_data(ocr_page(ocr_array(self.image), self.ocr_boxes))
+            return self.ocr_data
+
+    @property
+    def ocr_data(self):
+        return self._ocr_data
+
+    @ocr_data.setter
+    def ocr_data(self, ocr_data):
+        with self._ocr_lock:
+            self._ocr_data = ocr_data
+            self._text_index = None
+
+    @property
+    def text_index(self):
+        '''TextIndex of the page, running OCR first if needed.'''
+        with self._ocr_lock:
+            if self._text_index is None:
+                self._text_index = TextIndex(self.run_ocr())
+            return self._text_index
+
+    def find_text(self, search_term):
+        '''Return the SearchResults of search_term without storing them in search_results.
+
+        search_term is a case insensitive regex, or a literal string if it is
+        not a valid regex. It is matched against the page's lines, so phrases
+        spanning several words are found too.
+        '''
         if not search_term:
             return []
+        return [result._replace(pattern=search_term) for result in self.text_index.search(compile_pattern(search_term))]
 
-        # If OCR data is not cached, perform OCR
-        if self.ocr_data is None:
-            # Convert PIL image to OpenCV format
-            opencv_image = cv2.cvtColor(np.array(self.image), cv2.COLOR_RGB2BGR)
-            # Use pytesseract to get detailed data about text locations
-            self.ocr_data = pytesseract.image_to_data(opencv_image, output_type=pytesseract.Output.DICT)
+    def find_patterns(self, pattern_set):
+        '''Return the SearchResults of all patterns of a PatternSet without storing them in search_results.'''
+        return pattern_set.search(self.text_index)
 
-        # Search for the term in the recognized text using regex
-        try:
-            pattern = re.compile(search_term, re.IGNORECASE)
-        except re.error:
-            # If regex compilation fails, fall back to literal string search
-            pattern = None
-
-        for i, text in enumerate(self.ocr_data['text']):
-            match = False
-            if pattern:
-                # Try regex matching
-                if pattern.search(text):
-                    match = True
-            else:
-                # Fall back to simple string matching
-                if search_term.lower() in text.lower():
-                    match = True
-
-            if match:
-                # Get bounding box coordinates
-                x, y, w, h = self.ocr_data['left'][i], self.ocr_data['top'][i], self.ocr_data['width'][i], self.ocr_data['height'][i]
-                # Store the bounding box and text
-                self.search_results.append(((x, y, x + w, y + h), text))
+    def search_text(self, search_term):
+        '''Search for text in the image using OCR and return bounding boxes.'''
+        self.search_results = self.find_text(search_term)
+        return self.search_results
 
+    def search_patterns(self, pattern_set):
+        '''Search for all patterns of a PatternSet and return the SearchResults.'''
+        self.search_results = self.find_patterns(pattern_set)
         return self.search_results
 
     def ocr_search_text(self, bbox):
@@ -152,15 +385,13 @@ class ImageContainer:
             # Crop the image to the specified bounding box
             cropped_image = self.image.crop(bbox)
 
-            # Convert PIL image to OpenCV format
-            opencv_image = cv2.cvtColor(np.array(cropped_image), cv2.COLOR_RGB2BGR)
-
-            # Use pytesseract to extract text from the cropped image
-            text = pytesseract.image_to_string(opencv_image)
+            # Extract text from the cropped image with the process's OCR backend
+            with span('ocr_region'):
+                text = image_to_string(ocr_array(cropped_image))
 
             return text.strip()
         except Exception as e:
-            print(f"Error during OCR: {e}")
+            logger.warning("OCR of region %s failed: %s", bbox, e)
             return ""
 
     def clear_search_results(self):
@@ -0,0 +1,120 @@
+import os
+import shlex
+import threading
+import functools
+import pytesseract
+from PIL import Image
+
+# OCR backend: "tesserocr", "pytesseract" or "auto" to use tesserocr when it
+# is installed. Overridable with COVERUP_OCR_BACKEND
+BACKEND = os.environ.get('COVERUP_OCR_BACKEND', 'auto')
+
+DATA_KEYS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num', 'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+class PytesseractBackend:
+    '''Runs the tesseract executable once per call, passing images through temporary files.'''
+
+    name = 'pytesseract'
+
+    def __init__(self, lang, config):
+        self.lang = lang
+        self.config = config
+
+    def version(self):
+        return str(pytesseract.get_tesseract_version())
+
+    def image_to_data(self, array):
+        return pytesseract.image_to_data(array, lang=self.lang, config=self.config, output_type=pytesseract.Output.DICT)
+
+    def image_to_string(self, array):
+        return pytesseract.image_to_string(array, lang=self.lang, config=self.config)
+
+
+def parse_config(config):
+    '''Split a tesseract command line config into (psm, oem, variables).'''
+    psm, oem, variables = None, None, {}
+    args = iter(shlex.split(config))
+    for arg in args:
+        if arg == '--psm':
+            psm = int(next(args))
+        elif arg == '--oem':
+            oem = int(next(args))
+        elif arg == '--dpi':
+            variables['user_defined_dpi'] = next(args)
+        elif arg == '-c':
+            name, _, value = next(args).partition('=')
+            variables[name] = value
+    return psm, oem, variables
+
+
+class TesserocrBackend:
+    '''Keeps one Tesseract engine with its language data loaded for the life of the process.
+
+    Images are handed to the engine in memory. The engine is not thread-safe,
+    so calls are serialized.
+    '''
+
+    name = 'tesserocr'
+
+    def __init__(self, lang, config):
+        import tesserocr
+        self._tesserocr = tesserocr
+        psm, oem, variables = parse_config(config)
+        kwargs = {'lang': lang} if oem is None else {'lang': lang, 'oem': oem}
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        if psm is not None:
+            self._api.SetPageSegMode(psm)
+        for name, value in variables.items():
+            self._api.SetVariable(name, value)
+        self._lock = threading.Lock()
+
+    def version(self):
+        return self._tesserocr.tesseract_version().split()[1]
+
+    def _set_image(self, array):
+        self._api.SetImage(Image.fromarray(array if array.ndim == 2 else array[..., ::-1]))
+
+    def image_to_data(self, array):
+        RIL = self._tesserocr.RIL
+        data = {key: [] for key in DATA_KEYS}
+        with self._lock:
+            self._set_image(array)
+            self._api.Recognize()
+            iterator = self._api.GetIterator()
+            numbers = [0, 0, 0, 0]
+            for word in self._tesserocr.iterate_level(iterator, RIL.WORD) if iterator else ():
+                for level, ril in enumerate((RIL.BLOCK, RIL.PARA, RIL.TEXTLINE)):
+                    if word.IsAtBeginningOf(ril):
+                        numbers[level] += 1
+                        numbers[level + 1:] = [0] * (3 - level)
+                numbers[3] += 1
+                box = word.BoundingBox(RIL.WORD)
+                if box is None:
+                    continue
+                left, top, right, bottom = box
+                row = (5, 1, *numbers, left, top, right - left, bottom - top, word.Confidence(RIL.WORD), word.GetUTF8Text(RIL.WORD) or '')
+                for key, value in zip(DATA_KEYS, row):
+                    data[key].append(value)
+        return data
+
+    def image_to_string(self, array):
+        with self._lock:
+            self._set_image(array)
+            return self._api.GetUTF8Text()
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend(lang, config, backend=BACKEND):
+    '''Return this process's OCR backend for lang and config, creating it on first use.
+
+    With "auto", tesserocr is used when it is installed and can load the
+    language data, pytesseract otherwise.
+    '''
+    if backend in ('auto', 'tesserocr'):
+        try:
+            return TesserocrBackend(lang, config)
+        except (ImportError, RuntimeError):
+            if backend == 'tesserocr':
+                raise
+    return PytesseractBackend(lang, config)
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+import functools
+from src.model import model
+from src.model.ocr_backend import get_backend
+
+# Size limit of the OCR cache, overridable with COVERUP_OCR_CACHE_MB. 0 disables it.
+DEFAULT_MAX_BYTES = int(os.environ.get('COVERUP_OCR_CACHE_MB', 256)) * 1024 * 1024
+
+
+def default_directory():
+    '''Return the per-user cache directory for OCR results.'''
+    if 'COVERUP_OCR_CACHE_DIR' in os.environ:
+        return os.environ['COVERUP_OCR_CACHE_DIR']
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'coverup', 'ocr')
+
+
+@functools.lru_cache(maxsize=None)
+def tesseract_version():
+    return get_backend(model.TESSERACT_LANG, model.TESSERACT_CONFIG).version()
+
+
+class OcrCache:
+    '''Persistent cache of Tesseract output keyed by page content.
+
+    The key is a hash of the page pixels, the Tesseract version and the OCR
+    options, so a changed page or engine never returns stale data. Entries are
+    stored as zlib compressed JSON, one file per page. When the cache grows
+    beyond max_bytes the least recently used entries are deleted.
+
+    The cache holds the recognized text of unredacted pages, so files are only
+    readable by the current user.
+    '''
+
+    SUFFIX = '.ocr'
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self._current_bytes = None
+        self._lock = threading.Lock()
+
+    def key(self, image, config=''):
+        '''Return the cache key of a page image.'''
+        digest = hashlib.sha256()
+        digest.update(f"{tesseract_version()}|{model.TESSERACT_LANG}|{model.TESSERACT_CONFIG}|regions={model.OCR_REGIONS}|{config}|".encode())
+        digest.update(f"{image.mode}|{image.width}x{image.height}|".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key):
+        '''Return the cached OCR data for key or None.'''
+        if not self.max_bytes:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = json.loads(zlib.decompress(f.read()))
+            # The modification time doubles as last access time for eviction
+            os.utime(path)
+            return data
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def put(self, key, data):
+        '''Store OCR data under key and evict old entries if over the limit.'''
+        if not self.max_bytes:
+            return
+        blob = zlib.compress(json.dumps(data, separators=(',', ':')).encode(), 9)
+        with self._lock:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(blob)
+                path = self._path(key)
+                replaced = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+            except OSError:
+                return
+            if self._current_bytes is None:
+                self._current_bytes = sum(size for _, _, size in self._entries())
+            else:
+                self._current_bytes += len(blob) - replaced
+            if self._current_bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        '''Delete all cached entries.'''
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._current_bytes = 0
+
+    def _entries(self):
+        '''Return (path, mtime, size) of all entries.'''
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self):
+        '''Delete least recently used entries until the cache fits in max_bytes.'''
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._current_bytes = total
@@ -0,0 +1,137 @@
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from src.model import model
+from src.model.instrumentation import count
+
+# Number of OCR worker processes, overridable with COVERUP_OCR_WORKERS
+DEFAULT_WORKERS = int(os.environ.get('COVERUP_OCR_WORKERS', 0)) or os.cpu_count() or 1
+
+
+def _start_worker():
+    '''Pool initializer. Loads the OCR engine once, so every page a worker gets reuses it.'''
+    try:
+        model.get_backend(model.TESSERACT_LANG, model.TESSERACT_CONFIG)
+    except Exception:
+        pass  # reported by the first page instead
+
+
+def _ocr_worker(array, boxes):
+    '''Pool entry point. OCR errors are not always picklable, so they are re-raised as RuntimeError.'''
+    try:
+        return model.ocr_page(array, boxes)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class OcrEngine:
+    '''Run Tesseract on many pages in a pool of worker processes.
+
+    The pool is started on first use and kept for later searches. Pages are
+    submitted a few at a time so only a bounded number of page images are in
+    flight, and results are handed back as soon as each page finishes. Each
+    worker keeps its OCR backend loaded between pages. With an OcrCache, pages
+    that were recognized before are answered from disk.
+    '''
+
+    def __init__(self, workers=DEFAULT_WORKERS, cache=None):
+        self.workers = max(1, workers)
+        self.cache = cache
+        self._executor = None
+        # A cancelled search may still be running while the next one starts
+        self._pool_lock = threading.Lock()
+
+    def _pool(self):
+        with self._pool_lock:
+            if self._executor is None:
+                # Forking a process that runs a Qt event loop is unsafe
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_start_worker)
+            return self._executor
+
+    def start(self):
+        '''Start the worker processes now and wait until they have loaded their OCR backend.
+
+        Otherwise this happens while the first pages are recognized.
+        '''
+        if self.workers > 1:
+            pool = self._pool()
+            wait([pool.submit(os.getpid) for _ in range(self.workers)])
+
+    def _store(self, container, key, data):
+        container.add_ocr_data(data)
+        if key is not None:
+            self.cache.put(key, data)
+
+    def run(self, containers):
+        '''OCR containers and yield (index, container) for each page as it is done.
+
+        The result is stored in container.ocr_data. Pages that already have OCR
+        data, in memory, from an embedded text layer or in the cache, are
+        yielded without running Tesseract. Of pages whose text layer leaves
+        images uncovered, only those images are recognized. Closing the generator cancels the
+        pages that were not started yet.
+        '''
+        for index, container in enumerate(containers):
+            if container.load_text_layer():
+                yield index, container
+        pages = [(index, container) for index, container in enumerate(containers) if container.ocr_data is None]
+        inline = self.workers == 1 or len(pages) == 1
+
+        todo = iter(pages)
+        futures = {}
+        ready = deque()
+
+        def submit_next():
+            '''Start OCR of the next page. Returns False when all pages are started.'''
+            for index, container in todo:
+                image = container.image
+                boxes = container.ocr_boxes
+                key = data = None
+                if self.cache is not None:
+                    key = self.cache.key(image, config=f"boxes={boxes}" if boxes else '')
+                    data = self.cache.get(key)
+                    count('ocr_cache_hit' if data is not None else 'ocr_cache_miss')
+                if data is not None:
+                    container.add_ocr_data(data)
+                    ready.append((index, container))
+                elif inline:
+                    self._store(container, key, model.ocr_page(model.ocr_array(image), boxes))
+                    ready.append((index, container))
+                else:
+                    future = self._pool().submit(_ocr_worker, model.ocr_array(image), boxes)
+                    futures[future] = (index, container, key)
+                return True
+            return False
+
+        limit = 1 if inline else self.workers * 2
+        try:
+            while True:
+                while len(futures) + len(ready) < limit and submit_next():
+                    pass
+                if ready:
+                    yield ready.popleft()
+                    continue
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, container, key = futures.pop(future)
+                    self._store(container, key, future.result())
+                    ready.append((index, container))
+        except BrokenProcessPool:
+            self.shutdown()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        '''Stop the worker processes.'''
+        with self._pool_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
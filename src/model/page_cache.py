@@ -0,0 +1,140 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from src.model.instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for rendered pages, overridable with COVERUP_PAGE_CACHE_MB
+DEFAULT_MAX_BYTES = int(os.environ.get('COVERUP_PAGE_CACHE_MB', 512)) * 1024 * 1024
+
+
+def image_nbytes(image):
+    '''Approximate number of bytes a PIL image occupies in memory.'''
+    return image.width * image.height * len(image.getbands())
+
+
+class PageCache:
+    '''LRU cache of rendered page images bounded by a memory budget in bytes.
+
+    Entries are keyed by their owner (usually an ImageContainer). When an entry
+    is evicted the owner's release() method is called so it can drop anything
+    derived from the page bitmap. Everything else on the owner, like its
+    rectangles, is left untouched.
+
+    With a cold store, such as a CompressedPageStore, evicted pages are handed
+    to it and a later miss is answered from there before the loader is called.
+    A page that fails to go into the cold store is logged and rendered again
+    when it is needed, and pages evicted before a discard() or clear() never
+    reach the cold store after it.
+
+    The cache is thread-safe. Concurrent requests for the same page render it
+    only once.
+    '''
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cold=None):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.cold = cold
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.RLock()
+        # Serializes cold store writes with discard() and clear(), which
+        # bump the generation so that writes of older evictions are dropped
+        self._cold_lock = threading.Lock()
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, owner):
+        return owner in self._entries
+
+    def get(self, owner, loader):
+        '''Return the cached image of owner, rendering it with loader() on a miss.'''
+        with self._lock:
+            if owner in self._entries:
+                self._entries.move_to_end(owner)
+                count('page_cache_hit')
+                return self._entries[owner]
+            pending = self._loading.get(owner)
+            if pending is None:
+                pending = self._loading[owner] = threading.Event()
+                count('page_cache_miss')
+                render = True
+            else:
+                render = False
+
+        if not render:
+            # Another thread is rendering this page already
+            pending.wait()
+            return self.get(owner, loader)
+
+        try:
+            image = self.cold.get(owner) if self.cold is not None else None
+            if image is None:
+                image = loader()
+            else:
+                count('page_cache_cold_hit')
+            with self._lock:
+                self._entries[owner] = image
+                self.current_bytes += image_nbytes(image)
+                evicted = self._evict(keep=owner)
+                generation = self._generation
+        finally:
+            with self._lock:
+                del self._loading[owner]
+            pending.set()
+        if self.cold is not None and evicted:
+            # Compressing is slow, so it is done without holding the cache lock
+            self._put_cold(evicted, generation)
+        return image
+
+    def _put_cold(self, evicted, generation):
+        with self._cold_lock:
+            for owner, image in evicted:
+                if self._generation != generation:
+                    return
+                try:
+                    self.cold.put(owner, image)
+                except Exception:
+                    logger.exception("Could not move page %r to the cold store", owner)
+
+    def discard(self, owner):
+        '''Drop the entry of owner if it is cached, also from the cold store.'''
+        with self._lock:
+            self._generation += 1
+            image = self._entries.pop(owner, None)
+            if image is not None:
+                self.current_bytes -= image_nbytes(image)
+                owner.release()
+        if self.cold is not None:
+            with self._cold_lock:
+                self.cold.discard(owner)
+
+    def clear(self):
+        '''Drop all entries.'''
+        with self._lock:
+            self._generation += 1
+            owners = list(self._entries)
+            self._entries.clear()
+            self.current_bytes = 0
+            for owner in owners:
+                owner.release()
+        if self.cold is not None:
+            with self._cold_lock:
+                self.cold.clear()
+
+    def _evict(self, keep):
+        '''Evict least recently used entries until the budget is met and return them as (owner, image). Never evicts keep.'''
+        evicted = []
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            owner = next(iter(self._entries))
+            if owner is keep:
+                break
+            image = self._entries.pop(owner)
+            self.current_bytes -= image_nbytes(image)
+            owner.release()
+            evicted.append((owner, image))
+        return evicted
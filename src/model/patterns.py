@@ -0,0 +1,50 @@
+import re
+
+
+def read_pattern_file(path):
+    '''Return the patterns in a file, one per line. Blank lines and lines starting with # are ignored.'''
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\r\n') for line in f if line.strip() and not line.startswith('#')]
+
+
+def compile_pattern(pattern, flags=re.IGNORECASE):
+    '''Compile a search term as a regex, or as a literal string if it is not a valid regex.'''
+    try:
+        return re.compile(pattern, flags)
+    except re.error:
+        return re.compile(re.escape(pattern), flags)
+
+
+class PatternSet:
+    '''A set of search patterns, compiled once and matched against every page.
+
+    Every pattern is scanned on its own, so matches of different patterns may
+    overlap and the result is the same as searching each pattern separately.
+    A single alternation would let the first pattern matching at a position
+    hide longer matches of the others, and it is slower too, because the
+    regex engine can no longer skip ahead to the literal prefix of a pattern.
+    '''
+
+    def __init__(self, patterns, flags=re.IGNORECASE):
+        self.patterns = list(dict.fromkeys(pattern for pattern in patterns if pattern))
+        self._compiled = [(compile_pattern(pattern, flags), pattern) for pattern in self.patterns]
+
+    @classmethod
+    def from_file(cls, path, flags=re.IGNORECASE):
+        return cls(read_pattern_file(path), flags)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def search(self, text_index):
+        '''Return the SearchResults of all patterns in a page's TextIndex, pattern by pattern.
+
+        A box matched by several patterns is returned once, for the first of them.
+        '''
+        results, boxes = [], set()
+        for compiled, pattern in self._compiled:
+            for result in text_index.search(compiled):
+                if result.bbox not in boxes:
+                    boxes.add(result.bbox)
+                    results.append(result._replace(pattern=pattern))
+        return results
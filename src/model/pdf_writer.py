@@ -0,0 +1,131 @@
+import io
+import os
+import zlib
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from PIL import Image
+from src.model.instrumentation import traced
+
+# Image data ready to be embedded, with the PDF filter that decodes it
+EncodedImage = namedtuple('EncodedImage', ['data', 'width', 'height', 'colorspace', 'bits', 'filter'])
+
+
+@traced('encode')
+def encode_image(image):
+    '''Encode a PIL image or JPEG bytes for embedding in a PDF.
+
+    JPEG data is embedded as is. Other images are stored losslessly as
+    Flate compressed raw samples, 1-bit and grayscale images keep their depth.
+    '''
+    if isinstance(image, bytes):
+        with Image.open(io.BytesIO(image)) as jpeg:
+            colorspace = {'L': '/DeviceGray', 'CMYK': '/DeviceCMYK'}.get(jpeg.mode, '/DeviceRGB')
+            return EncodedImage(image, jpeg.width, jpeg.height, colorspace, 8, '/DCTDecode')
+
+    if image.mode == '1':
+        colorspace, bits = '/DeviceGray', 1
+    elif image.mode == 'L':
+        colorspace, bits = '/DeviceGray', 8
+    else:
+        image = image.convert('RGB')
+        colorspace, bits = '/DeviceRGB', 8
+    return EncodedImage(zlib.compress(image.tobytes(), 6), image.width, image.height, colorspace, bits, '/FlateDecode')
+
+
+class PdfWriter:
+    '''Write a PDF with one full page image per page straight to a file.
+
+    Every page is written out as soon as it is added, so memory use does not
+    grow with the number of pages. Only the object offsets are kept until
+    close() writes the page tree and cross reference table.
+
+    Pages go to a temporary file next to path, which replaces path when
+    close() completes. An existing file at path is left untouched if writing
+    fails, and the temporary file is deleted.
+    '''
+
+    CATALOG, PAGES, INFO = 1, 2, 3
+
+    def __init__(self, path, creator='CoverUp PDF'):
+        self.creator = creator
+        self.path = path
+        directory, name = os.path.split(os.path.abspath(path))
+        self._temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+        # Created like open() would, so the output gets the usual permissions
+        fd = os.open(self._temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        self._file = os.fdopen(fd, 'wb')
+        self._offsets = {}
+        self._pages = []
+        self._next_id = self.INFO + 1
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def __len__(self):
+        return len(self._pages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _write_object(self, obj_id, body, stream=None):
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(f"{obj_id} 0 obj\n".encode())
+        if stream is None:
+            self._file.write(body.encode() + b'\nendobj\n')
+        else:
+            self._file.write(body.encode() + b'\nstream\n')
+            self._file.write(stream)
+            self._file.write(b'\nendstream\nendobj\n')
+
+    @traced('pdf_write')
+    def add_page(self, image, width_pt, height_pt):
+        '''Add a page of width_pt x height_pt points covered by an EncodedImage.'''
+        image_id, content_id, page_id = self._new_id(), self._new_id(), self._new_id()
+        self._write_object(image_id,
+            f"<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+            f"/ColorSpace {image.colorspace} /BitsPerComponent {image.bits} "
+            f"/Filter {image.filter} /Length {len(image.data)} >>", image.data)
+        content = f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode()
+        self._write_object(content_id, f"<< /Length {len(content)} >>", content)
+        self._write_object(page_id,
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>")
+        self._pages.append(page_id)
+
+    def discard(self):
+        '''Close and delete the temporary file without touching path.'''
+        self._file.close()
+        try:
+            os.unlink(self._temp_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        '''Write the document structure, close the file and move it to path.'''
+        try:
+            kids = ' '.join(f"{page_id} 0 R" for page_id in self._pages)
+            self._write_object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>")
+            self._write_object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>")
+            creation_date = datetime.now().strftime('D:%Y%m%d%H%M%S')
+            self._write_object(self.INFO, f"<< /Creator ({self.creator}) /Producer ({self.creator}) /CreationDate ({creation_date}) >>")
+
+            xref_offset = self._file.tell()
+            self._file.write(f"xref\n0 {self._next_id}\n0000000000 65535 f \n".encode())
+            for obj_id in range(1, self._next_id):
+                self._file.write(f"{self._offsets[obj_id]:010d} 00000 n \n".encode())
+            self._file.write(f"trailer\n<< /Size {self._next_id} /Root {self.CATALOG} 0 R /Info {self.INFO} 0 R >>\n"
+                             f"startxref\n{xref_offset}\n%%EOF\n".encode())
+            self._file.close()
+            os.replace(self._temp_path, self.path)
+        except BaseException:
+            self.discard()
+            raise
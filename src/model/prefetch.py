@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PagePrefetcher:
+    '''Render the pages around the current one in a background thread.
+
+    After schedule() the next and previous radius pages are warmed in the page
+    cache, nearest first, so paging becomes a cache hit. Work for pages that
+    left the window is cancelled, and jumping further than radius cancels
+    everything that has not started yet.
+    '''
+
+    def __init__(self, radius=2, workers=1):
+        self.radius = radius
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='coverup-prefetch')
+        self._futures = {}
+        self._center = None
+
+    def window(self, current, page_count):
+        '''Return the page indexes to prefetch around current, nearest first.'''
+        pages = []
+        for distance in range(1, self.radius + 1):
+            for index in (current + distance, current - distance):
+                if 0 <= index < page_count:
+                    pages.append(index)
+        return pages
+
+    def schedule(self, containers, current):
+        '''Start prefetching the neighbours of page current in containers.'''
+        window = self.window(current, len(containers))
+        if self._center is None or abs(current - self._center) > self.radius:
+            self.cancel()
+        for index in list(self._futures):
+            if index not in window or self._futures[index].done():
+                self._futures.pop(index).cancel()
+        for index in window:
+            if index not in self._futures:
+                self._futures[index] = self._executor.submit(containers[index].load)
+        self._center = current
+
+    def cancel(self):
+        '''Cancel all prefetch work that has not started yet.'''
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._center = None
+
+    def shutdown(self):
+        '''Cancel pending work and stop the worker threads.'''
+        self.cancel()
+        self._executor.shutdown(wait=False)
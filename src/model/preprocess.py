@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+# If the detected text regions cover more than this fraction of the page, the
+# whole page is recognized at once instead
+FULL_PAGE_COVERAGE = 0.6
+
+# Every region is a separate recognizer call, and with the pytesseract backend
+# a separate process. Pages with more regions, like forms, have them merged
+# into rows, and are recognized at once if there are still more than this
+MAX_REGIONS = 8
+
+# Margin around each region, and white border added before recognition so
+# text never touches the edge of the crop
+REGION_PADDING = 8
+CROP_BORDER = 10
+
+# Regions smaller than this in either direction are specks, not text
+MIN_REGION_SIZE = 8
+
+
+def to_gray(array):
+    '''Return a grayscale version of an OpenCV image.'''
+    if array.ndim == 2:
+        return array
+    return cv2.cvtColor(array, cv2.COLOR_BGR2GRAY)
+
+
+def _merge_overlapping(boxes):
+    '''Merge (x0, y0, x1, y1) boxes until none of them overlap.'''
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for i, other in enumerate(result):
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
+
+
+def _merge_rows(boxes):
+    '''Merge (x0, y0, x1, y1) boxes whose vertical extents overlap into one box per row.'''
+    rows = []
+    for box in sorted(boxes, key=lambda box: box[1]):
+        if rows and box[1] < rows[-1][3]:
+            row = rows[-1]
+            rows[-1] = (min(row[0], box[0]), row[1], max(row[2], box[2]), max(row[3], box[3]))
+        else:
+            rows.append(box)
+    return rows
+
+
+def text_regions(gray, padding=REGION_PADDING):
+    '''Return the (x0, y0, x1, y1) boxes of the text blocks of a grayscale page, top to bottom.
+
+    The page is binarized with an adaptive threshold, so uneven scan
+    backgrounds do not matter, and dilated until the letters of a block run
+    together. The outer contours of the result are the blocks.
+    '''
+    height, width = gray.shape
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 31, 15)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 7))
+    dilated = cv2.dilate(binary, kernel, iterations=2)
+    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < MIN_REGION_SIZE or h < MIN_REGION_SIZE:
+            continue
+        boxes.append((max(x - padding, 0), max(y - padding, 0), min(x + w + padding, width), min(y + h + padding, height)))
+    return sorted(_merge_overlapping(boxes), key=lambda box: (box[1], box[0]))
+
+
+def ocr_regions(array, image_to_data):
+    '''Run image_to_data on the text regions of a page and return the word data in page coordinates.
+
+    Block numbers are renumbered across regions. More than MAX_REGIONS
+    regions are merged into rows. When no regions are found, there are still
+    more than MAX_REGIONS, or they cover most of the page, the whole page is
+    recognized as is.
+    '''
+    gray = to_gray(array)
+    regions = text_regions(gray)
+    if len(regions) > MAX_REGIONS:
+        regions = _merge_rows(regions)
+    page_area = gray.shape[0] * gray.shape[1]
+    if (not regions or len(regions) > MAX_REGIONS
+            or sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions) > FULL_PAGE_COVERAGE * page_area):
+        return image_to_data(array)
+    return ocr_boxes(gray, regions, image_to_data)
+
+
+def ocr_boxes(array, boxes, image_to_data):
+    '''Run image_to_data on the (x0, y0, x1, y1) boxes of a page and return the word data in page coordinates.
+
+    Each box is recognized in grayscale with a white border around it. Block
+    numbers are renumbered across boxes.
+    '''
+    gray = to_gray(array)
+    merged = None
+    block_offset = 0
+    for x0, y0, x1, y1 in boxes:
+        crop = cv2.copyMakeBorder(gray[y0:y1, x0:x1], CROP_BORDER, CROP_BORDER, CROP_BORDER, CROP_BORDER,
+                                  cv2.BORDER_CONSTANT, value=255)
+        data = image_to_data(np.ascontiguousarray(crop))
+        if merged is None:
+            merged = {key: [] for key in data}
+        blocks = [number for number in data.get('block_num', ()) if number]
+        for i in range(len(data['text'])):
+            for key in merged:
+                value = data[key][i]
+                if key == 'left':
+                    value += x0 - CROP_BORDER
+                elif key == 'top':
+                    value += y0 - CROP_BORDER
+                elif key == 'block_num' and value:
+                    value += block_offset
+                merged[key].append(value)
+        block_offset += max(blocks, default=0)
+    return merged
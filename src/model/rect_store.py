@@ -0,0 +1,139 @@
+import json
+import struct
+import numpy as np
+
+
+class RectangleStore:
+    '''Array backed list of rectangles.
+
+    Normalized corners are kept in an (n, 4) int32 array of x0, y0, x1, y1,
+    ids in an int64 array and fill colours as uint8 codes into a small
+    palette. Indexing and iterating yield the ((x0, y0), (x1, y1), fill, id)
+    tuples used everywhere else, but bulk operations work on the arrays.
+    '''
+
+    MAGIC = b'CVRS'
+    MIN_CAPACITY = 16
+
+    def __init__(self, rectangles=()):
+        self.colors = ['black', 'white']
+        self._boxes = np.empty((self.MIN_CAPACITY, 4), dtype=np.int32)
+        self._ids = np.empty(self.MIN_CAPACITY, dtype=np.int64)
+        self._codes = np.empty(self.MIN_CAPACITY, dtype=np.uint8)
+        self._length = 0
+        for rectangle in rectangles:
+            self.append(rectangle)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self._tuple(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._tuple(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('rectangle index out of range')
+        return self._tuple(index)
+
+    def __getstate__(self):
+        return {'colors': self.colors, 'boxes': self.boxes.copy(), 'ids': self.ids.copy(), 'codes': self.codes.copy()}
+
+    def __setstate__(self, state):
+        self.colors = state['colors']
+        self._boxes, self._ids, self._codes = state['boxes'], state['ids'], state['codes']
+        self._length = len(self._ids)
+
+    def copy(self):
+        store = RectangleStore()
+        store.__setstate__(self.__getstate__())
+        store.colors = list(self.colors)
+        return store
+
+    def _tuple(self, index):
+        x0, y0, x1, y1 = self._boxes[index].tolist()
+        return ((x0, y0), (x1, y1), self.colors[self._codes[index]], int(self._ids[index]))
+
+    @property
+    def boxes(self):
+        '''(n, 4) int32 view of the x0, y0, x1, y1 corners.'''
+        return self._boxes[:self._length]
+
+    @property
+    def ids(self):
+        return self._ids[:self._length]
+
+    @property
+    def codes(self):
+        '''Colour codes, indexes into self.colors.'''
+        return self._codes[:self._length]
+
+    def color_code(self, fill):
+        '''Return the palette code of a fill colour, adding it if necessary.'''
+        if fill not in self.colors:
+            if len(self.colors) == 256:
+                raise ValueError('too many fill colours')
+            self.colors.append(fill)
+        return self.colors.index(fill)
+
+    def append(self, rectangle):
+        '''Append a ((x0, y0), (x1, y1), fill, id) rectangle with normalized corners.'''
+        (x0, y0), (x1, y1), fill, rect_id = rectangle
+        if self._length == len(self._ids):
+            # Copies and loaded stores can have no spare capacity at all
+            capacity = max(self.MIN_CAPACITY, 2 * len(self._ids))
+            self._boxes = np.resize(self._boxes, (capacity, 4))
+            self._ids = np.resize(self._ids, capacity)
+            self._codes = np.resize(self._codes, capacity)
+        self._boxes[self._length] = (x0, y0, x1, y1)
+        self._ids[self._length] = rect_id
+        self._codes[self._length] = self.color_code(fill)
+        self._length += 1
+
+    def pop(self):
+        '''Remove and return the last rectangle.'''
+        if not self._length:
+            raise IndexError('pop from empty RectangleStore')
+        rectangle = self._tuple(self._length - 1)
+        self._length -= 1
+        return rectangle
+
+    def remove_ids(self, rect_ids):
+        '''Remove all rectangles whose id is in rect_ids, keeping the order of the others.'''
+        keep = ~np.isin(self.ids, np.fromiter(rect_ids, dtype=np.int64))
+        count = int(keep.sum())
+        self._boxes[:count] = self.boxes[keep]
+        self._ids[:count] = self.ids[keep]
+        self._codes[:count] = self.codes[keep]
+        self._length = count
+
+    def clear(self):
+        self._length = 0
+
+    def to_bytes(self):
+        '''Serialize to a compact little endian binary blob.'''
+        palette = json.dumps(self.colors).encode()
+        return b''.join((self.MAGIC, struct.pack('<II', self._length, len(palette)), palette,
+                         self.boxes.astype('<i4').tobytes(), self.ids.astype('<i8').tobytes(), self.codes.tobytes()))
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Load a store serialized with to_bytes.'''
+        if data[:4] != cls.MAGIC:
+            raise ValueError('not a rectangle store')
+        length, palette_length = struct.unpack_from('<II', data, 4)
+        offset = 12 + palette_length
+        store = cls()
+        store.colors = json.loads(data[12:offset])
+        boxes = np.frombuffer(data, dtype='<i4', count=length * 4, offset=offset).reshape(length, 4)
+        offset += boxes.nbytes
+        ids = np.frombuffer(data, dtype='<i8', count=length, offset=offset)
+        offset += ids.nbytes
+        codes = np.frombuffer(data, dtype=np.uint8, count=length, offset=offset)
+        store.__setstate__({'colors': store.colors, 'boxes': boxes.astype(np.int32),
+                            'ids': ids.astype(np.int64), 'codes': codes.copy()})
+        return store
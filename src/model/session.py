@@ -0,0 +1,119 @@
+import os
+import json
+import struct
+import hashlib
+import zipfile
+from src.model.document import load_document
+from src.model.rect_store import RectangleStore
+
+SESSION_EXTENSION = '.coverup'
+SESSION_VERSION = 1
+
+
+class SessionError(Exception):
+    '''The session file is invalid or does not belong to the source document.'''
+
+
+class SourceNotFoundError(SessionError):
+    '''The source document of a session could not be found.'''
+
+    def __init__(self, name):
+        super().__init__(f"Source document {name} not found")
+        self.name = name
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_session(containers, path, source_path):
+    '''Save the rectangles and OCR data of containers to a session file.
+
+    The session is a zip archive with a JSON manifest identifying the source
+    document by name and SHA-256, and per page the rectangles in
+    RectangleStore's binary format and the OCR word data as JSON. Page images
+    are not stored, they are rendered from the source document again.
+
+    The archive is written to a temporary file that replaces path when it is
+    complete. If saving fails, path is left as it was and the temporary file
+    is deleted.
+    '''
+    try:
+        relative_path = os.path.relpath(os.path.abspath(source_path), os.path.dirname(os.path.abspath(path)))
+    except ValueError:  # different drives on Windows
+        relative_path = os.path.basename(source_path)
+    manifest = {
+        'version': SESSION_VERSION,
+        'source': {'name': os.path.basename(source_path), 'path': relative_path, 'sha256': file_sha256(source_path)},
+        'pages': len(containers),
+    }
+    temp_path = path + '.tmp'
+    try:
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('session.json', json.dumps(manifest, indent=1))
+            for i, container in enumerate(containers):
+                if len(container.rectangles):
+                    archive.writestr(f'pages/{i}.rects', container.rectangles.to_bytes())
+                if container.ocr_data is not None:
+                    archive.writestr(f'pages/{i}.ocr', json.dumps(container.ocr_data, separators=(',', ':')))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def read_manifest(path):
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read('session.json'))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise SessionError(f"Not a CoverUP session: {e}") from None
+    if manifest.get('version') != SESSION_VERSION:
+        raise SessionError(f"Unsupported session version {manifest.get('version')}")
+    return manifest
+
+
+def find_source(path, manifest):
+    '''Return the source document of a session, looked up relative to and next to the session file, or None.'''
+    session_dir = os.path.dirname(os.path.abspath(path))
+    for candidate in (os.path.join(session_dir, manifest['source']['path']), os.path.join(session_dir, manifest['source']['name'])):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def load_session(path, source_path=None, page_cache=None):
+    '''Open a session and return (source_path, containers) with its rectangles and OCR data restored.
+
+    The source document is found next to the session unless source_path is
+    given, and must match the stored hash. Pages are only rendered when they
+    are shown, as with load_document.
+    '''
+    manifest = read_manifest(path)
+    source_path = source_path or find_source(path, manifest)
+    if source_path is None:
+        raise SourceNotFoundError(manifest['source']['name'])
+    if file_sha256(source_path) != manifest['source']['sha256']:
+        raise SessionError(f"{os.path.basename(source_path)} is not the document this session was made for")
+
+    containers = load_document(source_path, page_cache)
+    if len(containers) != manifest['pages']:
+        raise SessionError("The session does not match the page count of the document")
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+            for i, container in enumerate(containers):
+                if f'pages/{i}.rects' in names:
+                    container.rectangles = RectangleStore.from_bytes(archive.read(f'pages/{i}.rects'))
+                if f'pages/{i}.ocr' in names:
+                    container.ocr_data = json.loads(archive.read(f'pages/{i}.ocr'))
+    except (OSError, ValueError, struct.error, zipfile.BadZipFile) as e:
+        raise SessionError(f"Damaged session file: {e}") from None
+    return source_path, containers
@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+
+class GridIndex:
+    '''Uniform grid spatial index of rectangles by id.
+
+    Every rectangle is registered in the grid cells it overlaps, so point and
+    region queries only look at the rectangles near the query instead of all
+    of them. Boxes are (x0, y0, x1, y1) with inclusive corners.
+    '''
+
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self._cells = defaultdict(set)
+        self._boxes = {}
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def _cell_range(self, box):
+        x0, y0, x1, y1 = box
+        size = self.cell_size
+        return ((cx, cy) for cx in range(int(x0 // size), int(x1 // size) + 1)
+                for cy in range(int(y0 // size), int(y1 // size) + 1))
+
+    def insert(self, rect_id, box):
+        self._boxes[rect_id] = box
+        for cell in self._cell_range(box):
+            self._cells[cell].add(rect_id)
+
+    def remove(self, rect_id):
+        box = self._boxes.pop(rect_id, None)
+        if box is None:
+            return
+        for cell in self._cell_range(box):
+            ids = self._cells[cell]
+            ids.discard(rect_id)
+            if not ids:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._boxes.clear()
+
+    def at(self, x, y):
+        '''Return the ids of the rectangles that contain the point, in ascending order.'''
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        return sorted(rect_id for rect_id in self._cells.get(cell, ())
+                      if self._boxes[rect_id][0] <= x <= self._boxes[rect_id][2]
+                      and self._boxes[rect_id][1] <= y <= self._boxes[rect_id][3])
+
+    def intersecting(self, box):
+        '''Return the ids of the rectangles that intersect box, in ascending order.'''
+        x0, y0, x1, y1 = box
+        found = set()
+        for cell in self._cell_range(box):
+            found.update(self._cells.get(cell, ()))
+        return sorted(rect_id for rect_id in found
+                      if self._boxes[rect_id][0] <= x1 and x0 <= self._boxes[rect_id][2]
+                      and self._boxes[rect_id][1] <= y1 and y0 <= self._boxes[rect_id][3])
@@ -0,0 +1,134 @@
+import os
+import atexit
+import tempfile
+import threading
+import numpy as np
+from PIL import Image
+from src.model.instrumentation import count
+
+# Disk budget for pages spilled from the page cache, overridable with
+# COVERUP_SPILL_MB. 0, the default, disables spilling
+DEFAULT_MAX_BYTES = int(os.environ.get('COVERUP_SPILL_MB', 0)) * 1024 * 1024
+
+# Directory of the scratch file, overridable with COVERUP_SPILL_DIR
+DEFAULT_DIRECTORY = os.environ.get('COVERUP_SPILL_DIR') or None
+
+WIPE_CHUNK = 1024 * 1024
+
+
+class SpillStore:
+    '''Second tier of a PageCache that keeps evicted pages as raw pixels in a scratch file.
+
+    Pages are appended to one file and served back through np.memmap, so there
+    is no decode step and the OS page cache decides what stays in memory.
+    Grayscale pages share memory with the mapping, other modes are copied out
+    of it. Every page is written once and its bytes are never reused while
+    the store is open, so images handed out stay valid. Pages that do not fit
+    into max_bytes are not stored.
+
+    The file holds unredacted pages. It is only readable by the current user,
+    on POSIX it is unlinked right after creation, and close() and clear()
+    overwrite it with zeros and delete it. close() also runs at exit.
+    Thread-safe.
+    '''
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=DEFAULT_DIRECTORY):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.path = None
+        self._file = None
+        self._size = 0
+        self._entries = {}  # owner -> (offset, mode, size, nbytes)
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, owner):
+        return owner in self._entries
+
+    @property
+    def current_bytes(self):
+        return self._size
+
+    def _open(self):
+        fd, self.path = tempfile.mkstemp(prefix='coverup-spill-', suffix='.raw', dir=self.directory)
+        self._file = os.fdopen(fd, 'w+b', buffering=0)
+        if os.name != 'nt':
+            os.unlink(self.path)
+
+    def _write(self, data):
+        '''Write all of data at the current position, raising OSError if the file takes less.'''
+        view = memoryview(data)
+        while view:
+            written = self._file.write(view)
+            if not written:
+                raise OSError(f"Short write to spill file {self.path}")
+            view = view[written:]
+
+    def put(self, owner, image):
+        '''Store the page of owner. Pages that are stored already are kept as they are.'''
+        if owner in self._entries:
+            return
+        data = image.tobytes()
+        with self._lock:
+            if owner in self._entries or self._size + len(data) > self.max_bytes:
+                return
+            if self._file is None:
+                self._open()
+            self._file.seek(self._size)
+            self._write(data)
+            self._entries[owner] = (self._size, image.mode, image.size, len(data))
+            self._size += len(data)
+        count('spill_write')
+
+    def get(self, owner):
+        '''Return the page of owner mapped from the scratch file, or None if it is not stored.'''
+        with self._lock:
+            entry = self._entries.get(owner)
+            if entry is None:
+                return None
+            offset, mode, size, nbytes = entry
+            buffer = np.memmap(self._file, dtype=np.uint8, mode='r', offset=offset, shape=(nbytes,))
+        return Image.frombuffer(mode, size, buffer, 'raw', mode, 0, 1)
+
+    def discard(self, owner):
+        '''Forget the page of owner. Its bytes stay in the file until it is wiped.'''
+        with self._lock:
+            self._entries.pop(owner, None)
+
+    def clear(self):
+        '''Wipe and delete the scratch file. A new one is created for the next page.'''
+        with self._lock:
+            self._wipe()
+
+    def close(self):
+        self.clear()
+
+    def _wipe(self):
+        '''Overwrite the file with zeros, sync it to disk and delete it.
+
+        The file is not truncated, images still mapping it read zeros instead
+        of faulting. The whole file is overwritten, including what a failed
+        put() left behind the last page.
+        '''
+        self._entries.clear()
+        if self._file is None:
+            return
+        try:
+            zeros = bytes(WIPE_CHUNK)
+            length = os.fstat(self._file.fileno()).st_size
+            self._file.seek(0)
+            for start in range(0, length, WIPE_CHUNK):
+                self._write(zeros[:min(WIPE_CHUNK, length - start)])
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._file = None
+            self._size = 0
+            if os.name == 'nt':
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass  # still mapped, the zeroed file is left behind
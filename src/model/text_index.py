@@ -0,0 +1,74 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from src.model.instrumentation import traced
+
+# bbox is (x0, y0, x1, y1) in image coordinates, pattern the search term that matched
+SearchResult = namedtuple('SearchResult', 'bbox text pattern')
+
+
+class TextIndex:
+    '''Searchable text of a page built from Tesseract word data.
+
+    The recognized words are joined into lines, words separated by a space and
+    lines by a newline, so a regex can run once over the whole page and match
+    phrases that span several words. Every word keeps its character offsets
+    and bounding box, matches are mapped back to one merged box per line they
+    cover. Results are cached per pattern.
+    '''
+
+    def __init__(self, ocr_data):
+        lines = []
+        current_line = None
+        for i, text in enumerate(ocr_data['text']):
+            text = text.strip()
+            if not text:
+                continue
+            line = tuple(ocr_data[key][i] if key in ocr_data else 0 for key in ('block_num', 'par_num', 'line_num'))
+            if line != current_line:
+                lines.append([])
+                current_line = line
+            x, y, w, h = ocr_data['left'][i], ocr_data['top'][i], ocr_data['width'][i], ocr_data['height'][i]
+            lines[-1].append((text, (x, y, x + w, y + h)))
+
+        parts = []
+        self._starts, self._ends, self._boxes, self._lines = [], [], [], []
+        offset = 0
+        for line_number, words in enumerate(lines):
+            for text, bbox in words:
+                self._starts.append(offset)
+                self._ends.append(offset + len(text))
+                self._boxes.append(bbox)
+                self._lines.append(line_number)
+                parts.append(text)
+                parts.append(' ')
+                offset += len(text) + 1
+            if parts:
+                parts[-1] = '\n'
+        self.text = ''.join(parts)
+        self._results = {}
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def search(self, pattern):
+        '''Return a SearchResult for every match of the compiled regex pattern, one per line it covers.'''
+        if pattern not in self._results:
+            self._results[pattern] = self._find(pattern)
+        return [SearchResult(bbox, text, pattern.pattern) for bbox, text in self._results[pattern]]
+
+    @traced('regex')
+    def _find(self, pattern):
+        results = []
+        for match in pattern.finditer(self.text):
+            first = bisect_right(self._ends, match.start())
+            last = bisect_left(self._starts, match.end())
+            while first < last:
+                line_end = first
+                while line_end + 1 < last and self._lines[line_end + 1] == self._lines[first]:
+                    line_end += 1
+                boxes = self._boxes[first:line_end + 1]
+                bbox = (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                        max(box[2] for box in boxes), max(box[3] for box in boxes))
+                results.append((bbox, self.text[self._starts[first]:self._ends[line_end]]))
+                first = line_end + 1
+        return results
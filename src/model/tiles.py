@@ -0,0 +1,89 @@
+import math
+import threading
+from collections import OrderedDict
+
+TILE_SIZE = 512
+
+# Pages with more pixels than this are displayed from a tile pyramid
+TILED_MIN_PIXELS = 16 * 1024 * 1024
+
+# Number of reduced levels a pyramid keeps. The display needs one level at a
+# time, the second one keeps zooming across a level boundary cheap
+MAX_LEVELS = 2
+
+
+class TilePyramid:
+    '''Multi-resolution tile pyramid of a page image.
+
+    Level 0 is the full resolution page, every further level halves its size.
+    Levels are reduced when they are needed, and tiles are cut from them on
+    request. Only the max_levels most recently used reduced levels are kept,
+    level 0 is the page image held by the page cache. Coordinates passed in
+    and returned are always in level 0 pixels, which are the page's image
+    coordinates.
+    '''
+
+    def __init__(self, container, tile_size=TILE_SIZE, max_levels=MAX_LEVELS):
+        self.container = container
+        self.tile_size = tile_size
+        self.max_levels = max_levels
+        self.width, self.height = container.image.size
+        self.level_count = 1
+        while max(self.width, self.height) >> (self.level_count - 1) > tile_size:
+            self.level_count += 1
+        self._levels = OrderedDict()
+        self._lock = threading.Lock()
+
+    def level_for_scale(self, scale):
+        '''Return the coarsest level that still has at least scale pixels per page pixel.'''
+        if scale <= 0:
+            return self.level_count - 1
+        level = int(math.floor(math.log2(1 / scale))) if scale < 1 else 0
+        return min(max(level, 0), self.level_count - 1)
+
+    def level_image(self, level):
+        '''Return the image of a pyramid level.
+
+        A level that is not kept is reduced from the nearest finer level that
+        is, or from the page itself.
+        '''
+        if level == 0:
+            return self.container.image
+        with self._lock:
+            if level in self._levels:
+                self._levels.move_to_end(level)
+                return self._levels[level]
+            source = max((kept for kept in self._levels if kept < level), default=0)
+            image = self._levels.get(source)
+        if image is None:
+            image = self.container.image
+        image = (image.convert('L') if image.mode == '1' else image).reduce(2 ** (level - source))
+        with self._lock:
+            self._levels[level] = image
+            while len(self._levels) > self.max_levels:
+                self._levels.popitem(last=False)
+        return image
+
+    def tiles_in(self, rect, level):
+        '''Return (tx, ty, box) of the tiles of level that intersect rect.
+
+        rect and box are (left, top, right, bottom) in level 0 coordinates.
+        '''
+        span = self.tile_size << level
+        left, top, right, bottom = rect
+        columns = range(max(int(left // span), 0), min(int(math.ceil(right / span)), math.ceil(self.width / span)))
+        rows = range(max(int(top // span), 0), min(int(math.ceil(bottom / span)), math.ceil(self.height / span)))
+        return [(tx, ty, (tx * span, ty * span, min((tx + 1) * span, self.width), min((ty + 1) * span, self.height)))
+                for ty in rows for tx in columns]
+
+    def tile(self, level, tx, ty):
+        '''Return the image of one tile.'''
+        image = self.level_image(level)
+        left, top = tx * self.tile_size, ty * self.tile_size
+        return image.crop((left, top, min(left + self.tile_size, image.width), min(top + self.tile_size, image.height)))
+
+
+def needs_tiling(container):
+    '''Return True if a page is too large to be displayed as a single pixmap.'''
+    width, height = container.image.size
+    return width * height > TILED_MIN_PIXELS
@@ -6,6 +6,7 @@ class CustomGraphicsView(QGraphicsView):
         super().__init__(scene)
         self._controller = controller
         self._start_point = None
+        self._erase_start = None
         self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
 
     def mousePressEvent(self, event):
@@ -13,7 +14,7 @@ class CustomGraphicsView(QGraphicsView):
             if self._controller._edit_mode == 'draw':
                 self._start_point = event.pos()
             elif self._controller._edit_mode == 'erase':
-                self._controller.erase_rectangle(event.pos())
+                self._erase_start = event.pos()
 
 
     def mouseMoveEvent(self, event):
@@ -26,3 +27,10 @@ class CustomGraphicsView(QGraphicsView):
             end_point = event.pos()
             self._controller.draw_rectangle(self._start_point, end_point)
             self._start_point = None
+        elif event.button() == Qt.MouseButton.LeftButton and self._erase_start:
+            # A click erases the bar under the cursor, a drag all bars in the dragged region
+            if (event.pos() - self._erase_start).manhattanLength() < 4:
+                self._controller.erase_rectangle(event.pos())
+            else:
+                self._controller.erase_region(self._erase_start, event.pos())
+            self._erase_start = None
@@ -0,0 +1,100 @@
+import os
+import sys
+from collections import OrderedDict
+from PyQt6.QtGui import QImage, QPixmap
+from src.model.instrumentation import traced
+
+# Memory budget for converted page pixmaps, overridable with COVERUP_PIXMAP_CACHE_MB
+DEFAULT_MAX_BYTES = int(os.environ.get('COVERUP_PIXMAP_CACHE_MB', 128)) * 1024 * 1024
+
+# PIL modes Qt can display as they are: QImage format, bytes per pixel (0 for bit-packed rows)
+PIL_FORMATS = {
+    '1': (QImage.Format.Format_Mono, 0),
+    'L': (QImage.Format.Format_Grayscale8, 1),
+    'P': (QImage.Format.Format_Indexed8, 1),
+    'RGB': (QImage.Format.Format_RGB888, 3),
+    'RGBA': (QImage.Format.Format_RGBA8888, 4),
+    'RGBX': (QImage.Format.Format_RGBX8888, 4),
+}
+if sys.byteorder == 'little':
+    PIL_FORMATS['I;16'] = (QImage.Format.Format_Grayscale16, 2)
+
+
+def _color_table(image):
+    '''Return the ARGB color table of a palette image, with its transparent entries.'''
+    palette = image.getpalette('RGB') or []
+    alpha = [255] * (len(palette) // 3)
+    transparency = image.info.get('transparency')
+    if isinstance(transparency, int) and transparency < len(alpha):
+        alpha[transparency] = 0
+    elif isinstance(transparency, bytes):
+        alpha[:len(transparency)] = transparency[:len(alpha)]
+    return [a << 24 | r << 16 | g << 8 | b for r, g, b, a in zip(palette[0::3], palette[1::3], palette[2::3], alpha)]
+
+
+def to_qimage(image):
+    '''Return a QImage of a PIL image in any mode.
+
+    Modes Qt supports directly are handed over with a single copy of the
+    pixels, as PIL does not expose its own storage. Other modes are converted
+    to RGB, or RGBA when they have an alpha band.
+    '''
+    if image.mode == 'P' and image.palette is not None and image.palette.mode != 'RGB':
+        image = image.convert('RGBA')
+    if image.mode not in PIL_FORMATS:
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    image_format, depth = PIL_FORMATS[image.mode]
+    data = image.tobytes()
+    bytes_per_line = (image.width + 7) // 8 if depth == 0 else image.width * depth
+    qimage = QImage(data, image.width, image.height, bytes_per_line, image_format)
+    qimage._buffer = data
+    if image.mode == '1':
+        qimage.setColorTable([0xff000000, 0xffffffff])
+    elif image.mode == 'P':
+        qimage.setColorTable(_color_table(image))
+    return qimage
+
+
+@traced('qimage')
+def to_pixmap(image):
+    '''Return a QPixmap of a PIL image.'''
+    return QPixmap.fromImage(to_qimage(image))
+
+
+def pixmap_nbytes(pixmap):
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapCache:
+    '''LRU cache of converted pixmaps bounded by a memory budget in bytes.
+
+    Keys are chosen by the caller, usually (page, scale), so showing a page
+    again at a zoom level it was shown at before needs no conversion.
+    '''
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, make_pixmap):
+        '''Return the pixmap of key, creating it with make_pixmap() on a miss.'''
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        pixmap = self._entries[key] = make_pixmap()
+        self.current_bytes += pixmap_nbytes(pixmap)
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= pixmap_nbytes(evicted)
+        return pixmap
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
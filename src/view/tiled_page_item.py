@@ -0,0 +1,39 @@
+from PyQt6.QtWidgets import QGraphicsItem
+from PyQt6.QtGui import QPainter
+from PyQt6.QtCore import QRectF
+from src.view.qimage_bridge import PixmapCache
+
+
+class TiledPageItem(QGraphicsItem):
+    '''Graphics item that paints a page from a TilePyramid.
+
+    Only the tiles that are exposed, at the level matching the current zoom,
+    are converted and drawn. Converted tiles are kept in a PixmapCache, usually
+    the one holding the other page pixmaps, so they count against the same
+    memory budget and the cost of painting depends on the viewport and not on
+    the page size.
+    '''
+
+    def __init__(self, pyramid, to_pixmap, cache=None):
+        super().__init__()
+        self._pyramid = pyramid
+        self._to_pixmap = to_pixmap
+        self._cache = PixmapCache() if cache is None else cache
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        return QRectF(0, 0, self._pyramid.width, self._pyramid.height)
+
+    def _pixmap(self, level, tx, ty):
+        key = (self._pyramid.container, self._pyramid.tile_size, level, tx, ty)
+        return self._cache.get(key, lambda: self._to_pixmap(self._pyramid.tile(level, tx, ty)))
+
+    def paint(self, painter, option, widget=None):
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        level = self._pyramid.level_for_scale(option.levelOfDetailFromTransform(painter.worldTransform()))
+        exposed = option.exposedRect
+        rect = (exposed.left(), exposed.top(), exposed.right(), exposed.bottom())
+        for tx, ty, box in self._pyramid.tiles_in(rect, level):
+            pixmap = self._pixmap(level, tx, ty)
+            target = QRectF(box[0], box[1], box[2] - box[0], box[3] - box[1])
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
@@ -258,6 +258,8 @@ class MainWindow(QMainWindow):
         self.save_button.setToolTip('Save PDF')
         self.export_button = QPushButton()
         self.export_button.setToolTip('Export PDF')
+        self.save_session_button = QPushButton()
+        self.save_session_button.setToolTip('Save Session')
         self.undo_button = QPushButton()
         self.undo_button.setToolTip('Undo')
         self.edit_mode_button = QPushButton()
@@ -273,9 +275,14 @@ class MainWindow(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText('🔍text/regex...')
         self.search_input.setFixedWidth(150)
+        self.load_patterns_button = QPushButton()
+        self.load_patterns_button.setToolTip('Load Patterns')
         self.search_scope_combo = QComboBox()
         self.search_scope_combo.addItems(['All pages', 'Current page'])
         self.search_scope_combo.setCurrentText('All pages')
+        self.cancel_search_button = QPushButton()
+        self.cancel_search_button.setToolTip('Cancel Search')
+        self.cancel_search_button.setEnabled(False)
         self.redact_search_button = QPushButton()
         self.redact_search_button.setToolTip('Redact Search')
         self.prev_page_button = QPushButton()
@@ -300,6 +307,7 @@ class MainWindow(QMainWindow):
         toolbar_layout.addWidget(self.open_button)
         toolbar_layout.addWidget(self.save_button)
         toolbar_layout.addWidget(self.export_button)
+        toolbar_layout.addWidget(self.save_session_button)
         toolbar_layout.addStretch()
         toolbar_layout.addWidget(self.undo_button)
         toolbar_layout.addWidget(self.edit_mode_button)
@@ -310,6 +318,8 @@ class MainWindow(QMainWindow):
         toolbar_layout.addWidget(self.search_input)
         toolbar_layout.addWidget(self.search_scope_combo)
         toolbar_layout.addWidget(self.search_button)
+        toolbar_layout.addWidget(self.load_patterns_button)
+        toolbar_layout.addWidget(self.cancel_search_button)
         toolbar_layout.addWidget(self.redact_search_button)
         toolbar_layout.addStretch()
         toolbar_layout.addWidget(self.prev_page_button)
@@ -356,12 +366,15 @@ class MainWindow(QMainWindow):
             'folder_open': self.open_button,
             'save': self.save_button,
             'article': self.export_button,
+            'save_as': self.save_session_button,
             'undo': self.undo_button,
             'edit': self.edit_mode_button,
             'delete': self.delete_all_button,
             'palette': self.color_button,
             'high_quality': self.quality_button,
             'search': self.search_button,
+            'list': self.load_patterns_button,
+            'close': self.cancel_search_button,
             'edit_off': self.redact_search_button,
             'arrow_back': self.prev_page_button,
             'arrow_forward': self.next_page_button,
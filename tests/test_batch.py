@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from src.controller import batch
+
+
+OCR_DATA = {'text': ['Name:', 'John', 'SSN', '123-45-6789'],
+            'left': [10, 80, 10, 80], 'top': [10, 10, 40, 40], 'width': [60, 40, 30, 90], 'height': [12, 12, 12, 12]}
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp_dir.name, 'scan.png')
+        Image.new('RGB', (200, 100), color='white').save(self.input_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_scope(self):
+        self.assertEqual(batch.parse_scope('all', 3), [0, 1, 2])
+        self.assertEqual(batch.parse_scope('1,3-5', 10), [0, 2, 3, 4])
+        self.assertEqual(batch.parse_scope('2-99', 4), [1, 2, 3])
+
+    def test_expand_inputs(self):
+        open(os.path.join(self.tmp_dir.name, 'notes.txt'), 'w').close()
+        self.assertEqual(batch.expand_inputs([os.path.join(self.tmp_dir.name, '*')]), [self.input_path])
+
+    def test_redact_file(self):
+        output = batch.output_path(self.input_path)
+        with patch('src.model.model.image_to_data', return_value=OCR_DATA):
+            report = batch.redact_file(self.input_path, output, [r'\d{3}-\d{2}-\d{4}', 'john'], ocr_cache=False)
+        self.assertNotIn('error', report)
+        self.assertEqual(report['redactions'], 2)
+        self.assertEqual(report['matches'][0], {'page': 1, 'pattern': r'\d{3}-\d{2}-\d{4}', 'bbox': [80, 40, 170, 52]})
+        self.assertTrue(os.path.getsize(output) > 0)
+
+        with patch('src.model.model.image_to_data', return_value=OCR_DATA):
+            report = batch.redact_file(self.input_path, output, [r'\d{3}-\d{2}-\d{4}'], ocr_cache=False, report_text=True)
+        self.assertEqual(report['matches'][0]['text'], '123-45-6789')
+
+    def test_output_paths_are_distinct(self):
+        root = self.tmp_dir.name
+        inputs = [os.path.join(root, 'a', 'scan.pdf'), os.path.join(root, 'b', 'scan.pdf'),
+                  os.path.join(root, 'b', 'scan.png'), os.path.join(root, 'b', 'other.png')]
+        out = os.path.join(root, 'out')
+        self.assertEqual(batch.output_paths(inputs, out),
+                         [os.path.join(out, 'a', 'scan_redacted.pdf'), os.path.join(out, 'b', 'scan_pdf_redacted.pdf'),
+                          os.path.join(out, 'b', 'scan_png_redacted.pdf'), os.path.join(out, 'b', 'other_redacted.pdf')])
+        self.assertEqual(batch.output_paths(inputs[:2]), [os.path.join(root, 'a', 'scan_redacted.pdf'), os.path.join(root, 'b', 'scan_redacted.pdf')])
+        with self.assertRaises(ValueError):
+            batch.output_paths(inputs[1:3] + [os.path.join(root, 'b', 'scan_pdf.png')], out)
+
+    def test_main_writes_report(self):
+        report_path = os.path.join(self.tmp_dir.name, 'report.json')
+        with patch('src.model.model.image_to_data', return_value=OCR_DATA):
+            exit_code = batch.main([os.path.join(self.tmp_dir.name, '*.png'), '-e', 'SSN', '-o', self.tmp_dir.name,
+                                    '-r', report_path, '-j', '1', '--no-ocr-cache'])
+        self.assertEqual(exit_code, 0)
+        with open(report_path) as f:
+            result = json.load(f)
+        self.assertEqual(result['redactions'], 1)
+        self.assertNotIn('text', result['files'][0]['matches'][0])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, 'scan_redacted.pdf')))
+
+    def test_main_keeps_inputs_with_the_same_name_apart(self):
+        for name in ('a', 'b'):
+            os.makedirs(os.path.join(self.tmp_dir.name, name))
+            Image.new('RGB', (200, 100), color='white').save(os.path.join(self.tmp_dir.name, name, 'scan.png'))
+        out = os.path.join(self.tmp_dir.name, 'out')
+        # Output names are chosen before the files are handed to workers
+        with patch('src.model.model.image_to_data', return_value=OCR_DATA):
+            exit_code = batch.main([os.path.join(self.tmp_dir.name, '*', 'scan.png'), '-e', 'SSN', '-o', out,
+                                    '-r', os.path.join(self.tmp_dir.name, 'report.json'), '-j', '1', '--no-ocr-cache'])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(sorted(os.listdir(out)), ['a', 'b'])
+        for name in ('a', 'b'):
+            self.assertTrue(os.path.exists(os.path.join(out, name, 'scan_redacted.pdf')))
+
+    def test_no_qt_import(self):
+        code = 'import sys, src.controller.batch; print(any(name.startswith("PyQt6") for name in sys.modules))'
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.strip(), b'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
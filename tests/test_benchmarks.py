@@ -0,0 +1,26 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from benchmarks import run
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_run_benchmark(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            result = run.run_benchmark('search_text_layer', workdir, pages=2, repeat=1)
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['runs'], 1)
+        self.assertGreater(result['matches'], 0)
+
+    def test_compare_reports_regressions(self):
+        baseline = {'results': {'a': {'status': 'ok', 'seconds': 1.0}, 'b': {'status': 'ok', 'seconds': 1.0}}}
+        results = {'results': {'a': {'status': 'ok', 'seconds': 1.1}, 'b': {'status': 'ok', 'seconds': 2.0},
+                               'c': {'status': 'skipped'}}}
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(run.compare(results, baseline, 1.25), ['b'])
+        self.assertIn('slower', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import numpy as np
+from PIL import Image, ImageDraw
+from src.model.compact import CompressedPageStore, compact_array, compact_image, compress_image, decompress_image
+from src.model.model import ImageContainer
+from src.model.page_cache import PageCache, image_nbytes
+
+
+def text_page(mode='RGB', fill='black'):
+    image = Image.new(mode, (200, 100), 'white')
+    ImageDraw.Draw(image).text((10, 10), 'Account 123-45-6789', fill=fill)
+    return image
+
+
+class CountingLoader:
+    def __init__(self, image):
+        self.image = image
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.image.copy()
+
+
+class TestCompactImage(unittest.TestCase):
+    def test_gray_page_becomes_grayscale(self):
+        page = text_page()
+        compact = compact_image(page)
+        self.assertEqual(compact.mode, 'L')
+        self.assertEqual(compact.convert('RGB').tobytes(), page.tobytes())
+
+    def test_black_and_white_page_becomes_bilevel(self):
+        page = Image.new('RGB', (30, 20), 'white')
+        ImageDraw.Draw(page).rectangle((5, 5, 12, 9), fill='black')
+        compact = compact_image(page)
+        self.assertEqual(compact.mode, '1')
+        self.assertEqual(compact.convert('RGB').tobytes(), page.tobytes())
+        self.assertEqual(compact_image(page.convert('L')).mode, '1')
+
+    def test_colour_page_is_unchanged(self):
+        page = text_page(fill='red')
+        self.assertIs(compact_image(page), page)
+        self.assertEqual(compact_image(Image.new('RGBA', (5, 5))).mode, 'RGBA')
+
+    def test_almost_gray_pixels_count_as_gray(self):
+        array = np.full((10, 10, 3), 120, np.uint8)
+        array[..., 1] = 122
+        self.assertEqual(compact_array(array).mode, 'L')
+        array[..., 1] = 130
+        self.assertEqual(compact_array(array).mode, 'RGB')
+
+    def test_bgr_array(self):
+        array = np.zeros((4, 4, 3), np.uint8)
+        array[..., 0] = 255
+        image = compact_array(array, bgr=True)
+        self.assertEqual(image.getpixel((0, 0)), (0, 0, 255))
+
+    def test_compression_is_lossless(self):
+        for page in (text_page(), text_page('L'), compact_image(Image.new('RGB', (13, 7), 'white'))):
+            restored = decompress_image(compress_image(page))
+            self.assertEqual((restored.mode, restored.size, restored.tobytes()), (page.mode, page.size, page.tobytes()))
+
+    def test_bilevel_page_operations(self):
+        page = compact_image(Image.new('RGB', (40, 30), 'white'))
+        container = ImageContainer(page)
+        container.draw_rectangle((5, 5), (10, 10))
+        finalized = container.finalized_image()
+        self.assertEqual((finalized.mode, finalized.getpixel((7, 7)), finalized.getpixel((20, 20))), ('1', 0, 255))
+        container.scale_image(0.5)
+        self.assertEqual(container.scaled_image.mode, 'L')
+
+
+class TestCompressedPageStore(unittest.TestCase):
+    def setUp(self):
+        self.page = text_page('L')
+        page_bytes = image_nbytes(self.page)
+        self.store = CompressedPageStore()
+        self.cache = PageCache(max_bytes=page_bytes, cold=self.store)
+
+    def test_evicted_page_is_served_compressed(self):
+        loaders = [CountingLoader(self.page) for _ in range(2)]
+        containers = [ImageContainer(None, (48, 48), loader=loader, cache=self.cache) for loader in loaders]
+        containers[0].image
+        containers[1].image
+        self.assertNotIn(containers[0], self.cache)
+        self.assertIn(containers[0], self.store)
+        self.assertLess(self.store.current_bytes, image_nbytes(self.page))
+
+        self.assertEqual(containers[0].image.tobytes(), self.page.tobytes())
+        self.assertEqual(loaders[0].calls, 1)
+
+        self.cache.discard(containers[0])
+        self.assertNotIn(containers[0], self.store)
+        self.cache.clear()
+        self.assertEqual(len(self.store), 0)
+
+    def test_budget(self):
+        size = len(compress_image(self.page)[2])
+        store = CompressedPageStore(max_bytes=2 * size)
+        owners = [object() for _ in range(3)]
+        for owner in owners:
+            store.put(owner, self.page)
+        self.assertNotIn(owners[0], store)
+        self.assertEqual(store.current_bytes, 2 * size)
+        self.assertIsNone(store.get(owners[0]))
+
+        disabled = CompressedPageStore(max_bytes=0)
+        disabled.put(owners[0], self.page)
+        self.assertEqual(len(disabled), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
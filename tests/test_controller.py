@@ -0,0 +1,172 @@
+import os
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from PyQt6.QtCore import QPointF
+from PyQt6.QtWidgets import QApplication
+from src.controller.controller import Controller
+from src.model.model import ImageContainer
+from src.view.qimage_bridge import to_pixmap
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+OCR_DATA = {'text': ['call', 'hello', 'world'], 'left': [10, 60, 120], 'top': [10, 10, 10], 'width': [40, 50, 50], 'height': [20, 20, 20]}
+
+
+class InlineEngine:
+    '''Yields every page at once, the pages already have OCR data.'''
+
+    def run(self, containers):
+        yield from enumerate(containers)
+
+
+class EvictedWhileScaling(ImageContainer):
+    '''A page the prefetch thread evicts right after it was scaled.'''
+
+    def scale_image(self, scale=None):
+        image = super().scale_image(scale)
+        self.release()
+        return image
+
+
+class ControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = QApplication.instance() or QApplication([])
+        if not isinstance(self.app, QApplication):
+            self.skipTest('needs a QApplication')
+        self.controller = Controller()
+        self.controller._ocr_engine = InlineEngine()
+        self.pages = [ImageContainer(Image.new('RGB', (200, 100), 'white'), (96, 48)) for _ in range(3)]
+        for page in self.pages:
+            page.ocr_data = OCR_DATA
+        self.controller._images = self.pages
+        self.controller.update_view()
+
+    def tearDown(self):
+        self.controller._stop_search()
+        self.controller._prefetcher.shutdown()
+        self.controller._view.close()
+
+    def finish_search(self):
+        job = self.controller._search_job
+        self.assertTrue(job.wait(5))
+        return job
+
+
+class TestSearch(ControllerTestCase):
+    def test_results_are_applied_in_the_gui_thread(self):
+        self.controller._view.search_input.setText('hello')
+        self.controller.search_text()
+        self.finish_search()
+        self.assertEqual([page.search_results for page in self.pages], [[]] * 3)
+        self.app.processEvents()
+        self.assertEqual([len(page.search_results) for page in self.pages], [1, 1, 1])
+        self.assertEqual(self.controller._view.search_results_label.text(), 'Found 3 match(es) on all pages')
+
+    def test_results_of_a_cancelled_search_are_dropped(self):
+        self.controller._view.search_input.setText('hello')
+        self.controller.search_text()
+        self.finish_search()
+        # The job finished before it was cancelled, its signals are still queued
+        self.controller.cancel_search()
+        self.app.processEvents()
+        self.assertEqual([page.search_results for page in self.pages], [[]] * 3)
+
+        self.controller.redact_search_results()
+        self.assertEqual([len(page.rectangles) for page in self.pages], [0, 0, 0])
+
+    def test_replaced_search_only_applies_the_new_results(self):
+        self.controller._view.search_input.setText('hello')
+        self.controller.search_text()
+        first = self.finish_search()
+        self.controller._view.search_input.setText('world')
+        self.controller.search_text()
+        self.assertIsNot(self.controller._search_job, first)
+        self.finish_search()
+        self.app.processEvents()
+        self.assertEqual({result.text for page in self.pages for result in page.search_results}, {'world'})
+
+
+class TestDisplay(ControllerTestCase):
+    def test_page_released_while_scaling(self):
+        page = EvictedWhileScaling(Image.new('RGB', (200, 100), 'white'), (96, 48))
+        pixmap = self.controller._scaled_pixmap(page, 0.5)
+        self.assertEqual((pixmap.width(), pixmap.height()), (100, 50))
+        self.assertIsNone(page.scaled_image)
+
+    def test_pixmaps_are_cached_by_page_and_scale(self):
+        cache = self.controller._pixmap_cache
+        self.assertIn((self.pages[0], 1), cache)
+        with patch('src.controller.controller.to_pixmap', wraps=to_pixmap) as converted:
+            self.controller.next_page()
+            self.controller.prev_page()
+            self.assertEqual(converted.call_count, 1)
+            self.assertIn((self.pages[1], 1), cache)
+
+            self.pages[0].zoom_factor = 20
+            self.controller.update_view()
+            self.controller._sharpen_view()
+            scale = self.controller._view_scale(self.pages[0])
+            self.assertLess(scale, 1)
+            self.assertIn((self.pages[0], scale), cache)
+            self.assertEqual(converted.call_count, 2)
+
+            # Back at a zoom level the page was shown at before
+            self.controller.zoom_in()
+            self.controller._sharpen_view()
+            self.controller.zoom_out()
+            self.controller._sharpen_view()
+            self.assertEqual(self.controller._pixmap_item.pixmap().cacheKey(), cache.get((self.pages[0], scale), None).cacheKey())
+            self.assertEqual(converted.call_count, 2)
+
+        self.assertEqual(len(cache), 3)
+        self.controller._pixmap_cache.clear()
+        self.assertNotIn((self.pages[0], 1), cache)
+
+
+class TestRectangles(ControllerTestCase):
+    def view_point(self, x, y):
+        return self.controller._view.graphics_view.mapFromScene(QPointF(x, y))
+
+    def draw(self, left, top, right, bottom):
+        self.controller.draw_rectangle(self.view_point(left, top), self.view_point(right, bottom))
+
+    def test_only_the_changed_rectangle_item_is_updated(self):
+        scene = self.controller._scene
+        with patch.object(scene, 'clear') as clear:
+            before = set(scene.items())
+            self.draw(10, 10, 60, 40)
+            first = set(scene.items()) - before
+            self.assertEqual(len(first), 1)
+            self.draw(100, 50, 150, 90)
+            second = set(scene.items()) - before - first
+            self.assertEqual(len(second), 1)
+            self.assertEqual(set(scene.items()), before | first | second)
+
+            self.controller.erase_rectangle(self.view_point(30, 25))
+            self.assertEqual(set(scene.items()), before | second)
+            self.assertEqual(len(self.pages[0].rectangles), 1)
+
+            self.controller.undo()
+            self.assertEqual(set(scene.items()), before)
+            self.assertEqual(len(self.pages[0].rectangles), 0)
+        clear.assert_not_called()
+
+
+class TestExport(ControllerTestCase):
+    def test_window_takes_no_input_while_exporting(self):
+        enabled = []
+
+        def save_document(containers, path, *args, progress=None):
+            enabled.append(self.controller._view.isEnabled())
+            progress(len(containers))
+
+        with patch('src.controller.controller.QFileDialog.getSaveFileName', return_value=('out.pdf', '')), \
+             patch('src.controller.controller.save_document', side_effect=save_document):
+            self.controller.save_file()
+        self.assertEqual(enabled, [False])
+        self.assertTrue(self.controller._view.isEnabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
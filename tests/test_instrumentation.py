@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from unittest.mock import patch
+from src.model import instrumentation
+from src.model.instrumentation import Tracer, traced
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_trace(path):
+    with open(path) as f:
+        return json.loads(f.read().rstrip().rstrip(',') + ']')
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'trace.json')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_trace_file(self):
+        tracer = Tracer(self.path)
+        with tracer.span('render', page=3):
+            pass
+        tracer.count('page_cache_hit')
+        tracer.count('page_cache_hit')
+        tracer.close()
+
+        events = read_trace(self.path)
+        self.assertEqual(events[0]['ph'], 'M')
+        span = next(event for event in events if event['ph'] == 'X')
+        self.assertEqual((span['name'], span['args'], span['pid']), ('render', {'page': 3}, os.getpid()))
+        self.assertGreaterEqual(span['dur'], 0)
+        counters = [event['args']['page_cache_hit'] for event in events if event['ph'] == 'C']
+        self.assertEqual(counters, [1, 2])
+        self.assertEqual(tracer.totals['render'][0], 1)
+
+    def test_appending_process_keeps_events(self):
+        first = Tracer(self.path)
+        with first.span('save'):
+            pass
+        second = Tracer(self.path, truncate=False)
+        with second.span('encode'):
+            pass
+        first.close()
+        second.close()
+        self.assertEqual([event['name'] for event in read_trace(self.path) if event['ph'] == 'X'], ['save', 'encode'])
+
+    def test_log(self):
+        tracer = Tracer()
+        with self.assertLogs('coverup.trace', 'INFO') as logs:
+            with tracer.span('regex', patterns=2):
+                pass
+            tracer.count('ocr_cache_miss', 3)
+            tracer.summary()
+        self.assertRegex(logs.output[0], r'span=regex ms=[\d.]+ patterns=2')
+        self.assertIn('total counter=ocr_cache_miss value=3', logs.output[-1])
+
+    def test_disabled(self):
+        def function():
+            return 1
+        with patch.object(instrumentation, 'TRACER', None):
+            self.assertIs(traced('ocr')(function), function)
+            with instrumentation.span('ocr'):
+                instrumentation.count('ocr_cache_hit')
+
+    def test_worker_processes_append_to_trace(self):
+        script = (
+            "from PIL import Image\n"
+            "from src.model.model import ImageContainer\n"
+            "from src.model.document import save_document\n"
+            "containers = [ImageContainer(Image.new('RGB', (200, 300), 'white'), (96, 144)) for _ in range(2)]\n"
+            f"save_document(containers, {os.path.join(self.temp_dir.name, 'out.pdf')!r}, workers=2)\n"
+        )
+        env = dict(os.environ, COVERUP_TRACE=self.path, COVERUP_PARALLEL_EXPORT_PAGES='2')
+        subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True, timeout=120)
+
+        spans = [event for event in read_trace(self.path) if event['ph'] == 'X']
+        names = {event['name'] for event in spans}
+        self.assertTrue({'save', 'finalize', 'encode', 'pdf_write'} <= names)
+        self.assertGreater(len({event['pid'] for event in spans}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import os
+import io
 from PIL import Image, ImageDraw, ImageFont
 from src.model.model import ImageContainer
 
@@ -65,5 +66,53 @@ class TestImageContainer(unittest.TestCase):
         self.container.undo()
         self.assertEqual(len(self.container.rectangles), 0)
 
+    def test_rectangle_ids_and_hit_testing(self):
+        self.container.draw_rectangle((50, 40), (10, 10))
+        self.container.draw_rectangle((30, 30), (300, 100), 'white')
+        first_id, second_id = [rectangle[3] for rectangle in self.container.rectangles]
+        self.assertEqual(self.container.rectangles[0][:2], ((10, 10), (50, 40)))
+        self.assertEqual(self.container.rectangle_at((20, 20)), first_id)
+        self.assertEqual(self.container.rectangle_at((40, 35)), second_id)
+        self.assertIsNone(self.container.rectangle_at((350, 150)))
+        self.assertEqual(self.container.rectangles_in((60, 0), (0, 20)), [first_id])
+
+        self.container.remove_rectangles([first_id])
+        self.assertEqual(len(self.container.rectangles), 1)
+        self.assertIsNone(self.container.rectangle_at((20, 20)))
+        self.container.undo()
+        self.assertEqual(self.container.rectangles_in((0, 0), (400, 200)), [])
+
+        self.container.draw_rectangle((0, 0), (5, 5))
+        self.assertNotIn(self.container.rectangles[0][3], (first_id, second_id))
+
+    def test_rectangles_without_ids(self):
+        container = ImageContainer(self.image, (400, 200), rectangles=[((0, 0), (10, 10), 'black', None), ((5, 5), (20, 20), 'black', 7)])
+        self.assertEqual([rectangle[3] for rectangle in container.rectangles], [1, 7])
+        container.draw_rectangle((0, 0), (1, 1))
+        self.assertEqual(container.rectangles[-1][3], 8)
+        self.assertEqual(container.rectangle_at((15, 15)), 7)
+
+    def test_finalized_image_matches_imagedraw(self):
+        self.container.draw_rectangle((10, 10), (50, 40))
+        self.container.draw_rectangle((30, 30), (120, 60), 'white')
+        self.container.draw_rectangle((-20, 150), (20, 250))
+        self.container.draw_rectangle((500, 10), (600, 20))
+        expected = self.image.copy()
+        draw = ImageDraw.Draw(expected)
+        for start_point, end_point, fill, rect_id in self.container.rectangles:
+            draw.rectangle(xy=[start_point, end_point], fill=fill)
+        final_image = self.container.finalized_image()
+        self.assertEqual(final_image.tobytes(), expected.tobytes())
+        self.assertEqual(self.image.getpixel((10, 10)), (255, 255, 255))
+
+    def test_finalized_image_keeps_the_page_mode(self):
+        for mode in ('P', 'RGBA', 'L', '1'):
+            container = ImageContainer(self.image.convert(mode), (100, 100))
+            container.draw_rectangle((10, 10), (50, 40))
+            final_image = container.finalized_image()
+            self.assertEqual(final_image.mode, mode)
+            self.assertEqual(final_image.convert('L').getpixel((30, 30)), 0)
+        self.assertEqual(Image.open(io.BytesIO(container.finalized_image('JPEG'))).mode, 'L')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import types
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+from src.model.ocr_backend import get_backend, parse_config, PytesseractBackend, TesserocrBackend
+
+
+def fake_tesserocr(words):
+    '''A tesserocr module whose engine returns words as (text, box, starts) with starts a set of 'block', 'para', 'line'.'''
+    module = types.SimpleNamespace(RIL=types.SimpleNamespace(BLOCK='block', PARA='para', TEXTLINE='line', WORD='word'))
+    iterators = []
+    for text, box, starts in words:
+        word = MagicMock()
+        word.GetUTF8Text.return_value = text
+        word.BoundingBox.return_value = box
+        word.Confidence.return_value = 90.0
+        word.IsAtBeginningOf.side_effect = starts.__contains__
+        iterators.append(word)
+    module.iterate_level = lambda iterator, level: iter(iterators)
+    module.PyTessBaseAPI = MagicMock()
+    module.tesseract_version = lambda: 'tesseract 5.3.0\n leptonica-1.82.0'
+    return module
+
+
+class TestOcrBackend(unittest.TestCase):
+    def setUp(self):
+        get_backend.cache_clear()
+
+    def tearDown(self):
+        get_backend.cache_clear()
+
+    def test_parse_config(self):
+        self.assertEqual(parse_config('--psm 6 --oem 1 -c preserve_interword_spaces=1 --dpi 150'),
+                         (6, 1, {'preserve_interword_spaces': '1', 'user_defined_dpi': '150'}))
+        self.assertEqual(parse_config(''), (None, None, {}))
+
+    def test_falls_back_to_pytesseract(self):
+        with patch.dict(sys.modules, {'tesserocr': None}):
+            backend = get_backend('eng', '', 'auto')
+            self.assertIsInstance(backend, PytesseractBackend)
+            self.assertIs(get_backend('eng', '', 'auto'), backend)
+            with self.assertRaises(ImportError):
+                get_backend('eng', '', 'tesserocr')
+
+    def test_tesserocr_word_data(self):
+        module = fake_tesserocr([('Hello', (1, 2, 11, 12), {'block', 'para', 'line'}), ('World', (20, 2, 40, 12), set()),
+                                 ('Next', (1, 20, 15, 30), {'line'}), ('Block', (1, 50, 15, 60), {'block', 'para', 'line'})])
+        with patch.dict(sys.modules, {'tesserocr': module}):
+            backend = get_backend('deu', '--psm 6', 'tesserocr')
+        self.assertIsInstance(backend, TesserocrBackend)
+        module.PyTessBaseAPI.assert_called_once_with(lang='deu')
+        module.PyTessBaseAPI.return_value.SetPageSegMode.assert_called_once_with(6)
+        self.assertEqual(backend.version(), '5.3.0')
+        data = backend.image_to_data(np.zeros((64, 64, 3), dtype=np.uint8))
+        self.assertEqual(data['text'], ['Hello', 'World', 'Next', 'Block'])
+        self.assertEqual(data['block_num'], [1, 1, 1, 2])
+        self.assertEqual(data['line_num'], [1, 1, 2, 1])
+        self.assertEqual(data['word_num'], [1, 2, 1, 1])
+        self.assertEqual((data['left'][1], data['top'][1], data['width'][1], data['height'][1]), (20, 2, 20, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
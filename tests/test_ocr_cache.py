@@ -0,0 +1,62 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from src.model.model import ImageContainer
+from src.model.ocr_engine import OcrEngine
+from src.model.ocr_cache import OcrCache
+
+
+OCR_DATA = {'text': ['Hello'], 'left': [1], 'top': [2], 'width': [3], 'height': [4]}
+
+
+@patch('src.model.ocr_cache.tesseract_version', return_value='5.3.0')
+class TestOcrCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = OcrCache(self.tmp_dir.name)
+        self.image = Image.new('RGB', (50, 50), color='white')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self, _):
+        key = self.cache.key(self.image)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, OCR_DATA)
+        self.assertEqual(OcrCache(self.tmp_dir.name).get(key), OCR_DATA)
+
+    def test_key_depends_on_pixels_and_version(self, mock_version):
+        key = self.cache.key(self.image)
+        self.assertEqual(key, self.cache.key(self.image.copy()))
+        self.assertNotEqual(key, self.cache.key(Image.new('RGB', (50, 50), color='black')))
+        self.assertNotEqual(key, self.cache.key(self.image, config='roi'))
+        mock_version.return_value = '5.4.0'
+        self.assertNotEqual(key, self.cache.key(self.image))
+
+    def test_lru_eviction(self, _):
+        self.cache.put('a', OCR_DATA)
+        entry_size = os.path.getsize(os.path.join(self.tmp_dir.name, 'a' + OcrCache.SUFFIX))
+        self.cache.max_bytes = 2 * entry_size
+        self.cache.put('b', OCR_DATA)
+        old = time.time() - 100
+        os.utime(os.path.join(self.tmp_dir.name, 'b' + OcrCache.SUFFIX), (old, old))
+        os.utime(os.path.join(self.tmp_dir.name, 'a' + OcrCache.SUFFIX), (old + 1, old + 1))
+        self.cache.put('c', OCR_DATA)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), OCR_DATA)
+        self.assertEqual(self.cache.get('c'), OCR_DATA)
+
+    def test_engine_uses_cache(self, _):
+        containers = [ImageContainer(self.image, (24, 24)) for _ in range(2)]
+        self.cache.put(self.cache.key(self.image), OCR_DATA)
+        with patch('src.model.model.image_to_data') as mock_ocr:
+            list(OcrEngine(workers=1, cache=self.cache).run(containers))
+        mock_ocr.assert_not_called()
+        self.assertEqual(containers[1].ocr_data, OCR_DATA)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from src.model.model import ImageContainer
+from src.model.ocr_engine import OcrEngine
+
+
+OCR_DATA = {'text': ['Hello'], 'left': [1], 'top': [2], 'width': [3], 'height': [4]}
+
+
+class TestOcrEngine(unittest.TestCase):
+    def setUp(self):
+        self.containers = [ImageContainer(Image.new('RGB', (50, 50), color='white'), (24, 24)) for _ in range(3)]
+
+    def test_cached_pages_skip_ocr(self):
+        for container in self.containers:
+            container.ocr_data = OCR_DATA
+        with patch('src.model.model.image_to_data') as mock_ocr:
+            results = list(OcrEngine(workers=4).run(self.containers))
+        mock_ocr.assert_not_called()
+        self.assertEqual([index for index, _ in results], [0, 1, 2])
+
+    def test_run_stores_ocr_data(self):
+        self.containers[1].ocr_data = OCR_DATA
+        with patch('src.model.model.image_to_data', return_value=OCR_DATA) as mock_ocr:
+            results = list(OcrEngine(workers=1).run(self.containers))
+        self.assertEqual(mock_ocr.call_count, 2)
+        self.assertEqual(sorted(index for index, _ in results), [0, 1, 2])
+        for container in self.containers:
+            self.assertEqual(container.search_text('hello'), [((1, 2, 4, 6), 'Hello', 'hello')])
+
+    def test_start_launches_all_workers(self):
+        engine = OcrEngine(workers=2)
+        try:
+            engine.start()
+            self.assertEqual(len(engine._executor._processes), 2)
+        finally:
+            engine.shutdown()
+        inline = OcrEngine(workers=1)
+        inline.start()
+        self.assertIsNone(inline._executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from PIL import Image
+from src.model.model import ImageContainer
+from src.model.page_cache import PageCache, image_nbytes
+from src.model.prefetch import PagePrefetcher
+
+
+class CountingLoader:
+    def __init__(self, size=(100, 100)):
+        self.size = size
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return Image.new('RGB', self.size, color='white')
+
+
+class RecordingStore:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.pages = {}
+
+    def put(self, owner, image):
+        if self.fail:
+            raise OSError('disk full')
+        self.pages[owner] = image
+
+    def get(self, owner):
+        return self.pages.get(owner)
+
+    def discard(self, owner):
+        self.pages.pop(owner, None)
+
+    def clear(self):
+        self.pages.clear()
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        page_bytes = image_nbytes(Image.new('RGB', (100, 100)))
+        self.cache = PageCache(max_bytes=2 * page_bytes)
+
+    def test_lazy_rendering(self):
+        loader = CountingLoader()
+        container = ImageContainer(None, (48, 48), loader=loader, cache=self.cache)
+        self.assertEqual(loader.calls, 0)
+        self.assertEqual(container.image.size, (100, 100))
+        container.image
+        self.assertEqual(loader.calls, 1)
+
+    def test_lru_eviction_keeps_rectangles(self):
+        loaders = [CountingLoader() for _ in range(3)]
+        containers = [ImageContainer(None, (48, 48), loader=loader, cache=self.cache) for loader in loaders]
+        containers[0].draw_rectangle((0, 0), (10, 10))
+        containers[0].scale_image()
+        for container in containers:
+            container.image
+        self.assertEqual(len(self.cache), 2)
+        self.assertNotIn(containers[0], self.cache)
+        self.assertIsNone(containers[0].scaled_image)
+        self.assertEqual(len(containers[0].rectangles), 1)
+
+        containers[0].image
+        self.assertEqual(loaders[0].calls, 2)
+        self.assertLessEqual(self.cache.current_bytes, self.cache.max_bytes)
+
+    def test_recently_used_page_is_kept(self):
+        loaders = [CountingLoader() for _ in range(3)]
+        containers = [ImageContainer(None, (48, 48), loader=loader, cache=self.cache) for loader in loaders]
+        containers[0].image
+        containers[1].image
+        containers[0].image
+        containers[2].image
+        self.assertIn(containers[0], self.cache)
+        self.assertNotIn(containers[1], self.cache)
+
+    def test_failing_cold_store(self):
+        cold = RecordingStore(fail=True)
+        cache = PageCache(max_bytes=self.cache.max_bytes, cold=cold)
+        loaders = [CountingLoader() for _ in range(3)]
+        containers = [ImageContainer(None, (48, 48), loader=loader, cache=cache) for loader in loaders]
+        with self.assertLogs('src.model.page_cache', 'ERROR'):
+            for container in containers:
+                self.assertEqual(container.image.size, (100, 100))
+        self.assertEqual(containers[0].image.size, (100, 100))
+        self.assertEqual(loaders[0].calls, 2)
+
+    def test_evictions_before_clear_are_not_stored(self):
+        cold = RecordingStore()
+        cache = PageCache(max_bytes=self.cache.max_bytes, cold=cold)
+        container = ImageContainer(None, (48, 48), loader=CountingLoader(), cache=cache)
+        # As if the evicting thread was preempted before its cold put
+        generation = cache._generation
+        cache.clear()
+        cache._put_cold([(container, Image.new('RGB', (100, 100)))], generation)
+        self.assertEqual(cold.pages, {})
+        cache._put_cold([(container, Image.new('RGB', (100, 100)))], cache._generation)
+        self.assertIn(container, cold.pages)
+
+
+class TestPagePrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.cache = PageCache()
+        self.loaders = [CountingLoader() for _ in range(10)]
+        self.containers = [ImageContainer(None, (48, 48), loader=loader, cache=self.cache) for loader in self.loaders]
+        self.prefetcher = PagePrefetcher(radius=2)
+
+    def tearDown(self):
+        self.prefetcher.shutdown()
+
+    def test_window(self):
+        self.assertEqual(self.prefetcher.window(0, 10), [1, 2])
+        self.assertEqual(self.prefetcher.window(5, 10), [6, 4, 7, 3])
+        self.assertEqual(self.prefetcher.window(9, 10), [8, 7])
+
+    def test_prefetch_neighbours(self):
+        self.prefetcher.schedule(self.containers, 5)
+        for future in list(self.prefetcher._futures.values()):
+            future.result()
+        for index in (3, 4, 6, 7):
+            self.assertIn(self.containers[index], self.cache)
+        self.assertNotIn(self.containers[5], self.cache)
+
+        # Paging onto a prefetched page does not render again
+        self.containers[6].image
+        self.assertEqual(self.loaders[6].calls, 1)
+
+    def test_cancel(self):
+        self.prefetcher.schedule(self.containers, 0)
+        self.prefetcher.cancel()
+        self.assertEqual(self.prefetcher._futures, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from src.model import preprocess
+
+
+def fake_image_to_data(array):
+    '''One word per call, covering the whole crop.'''
+    fake_image_to_data.calls.append(array.shape)
+    height, width = array.shape[:2]
+    return {'text': ['', 'word'], 'left': [0, 0], 'top': [0, 0], 'width': [width, width], 'height': [height, height],
+            'block_num': [0, 1], 'par_num': [0, 1], 'line_num': [0, 1]}
+
+
+class TestPreprocess(unittest.TestCase):
+    def setUp(self):
+        fake_image_to_data.calls = []
+        self.page = np.full((800, 600), 255, dtype=np.uint8)
+        self.page[100:120, 50:250] = 0
+        self.page[600:615, 300:500] = 0
+
+    def test_text_regions(self):
+        regions = preprocess.text_regions(self.page)
+        self.assertEqual(len(regions), 2)
+        x0, y0, x1, y1 = regions[0]
+        self.assertTrue(x0 <= 50 and y0 <= 100 and x1 >= 250 and y1 >= 120)
+        self.assertLess(y1, regions[1][1])
+
+    def test_ocr_regions_maps_boxes_to_page(self):
+        data = preprocess.ocr_regions(self.page, fake_image_to_data)
+        self.assertEqual(len(fake_image_to_data.calls), 2)
+        self.assertEqual(data['text'], ['', 'word', '', 'word'])
+        self.assertEqual(data['block_num'], [0, 1, 0, 2])
+        regions = preprocess.text_regions(self.page)
+        for i, (x0, y0, x1, y1) in zip((1, 3), regions):
+            self.assertEqual((data['left'][i], data['top'][i]), (x0 - preprocess.CROP_BORDER, y0 - preprocess.CROP_BORDER))
+
+    def test_full_page_fallback(self):
+        blank = np.full((100, 100, 3), 255, dtype=np.uint8)
+        preprocess.ocr_regions(blank, fake_image_to_data)
+        self.assertEqual(fake_image_to_data.calls, [(100, 100, 3)])
+        dense = np.zeros((100, 100), dtype=np.uint8)
+        dense[::4] = 255
+        preprocess.ocr_regions(dense, fake_image_to_data)
+        self.assertEqual(fake_image_to_data.calls[-1], (100, 100))
+
+    def test_many_regions_are_merged_into_rows(self):
+        form = np.full((800, 1800), 255, dtype=np.uint8)
+        for row in (100, 500):
+            for column in range(6):
+                form[row:row + 12, 50 + column * 300:150 + column * 300] = 0
+        self.assertEqual(len(preprocess.text_regions(form)), 12)
+        data = preprocess.ocr_regions(form, fake_image_to_data)
+        self.assertEqual(len(fake_image_to_data.calls), 2)
+        self.assertLess(data['left'][1], 50)
+        self.assertGreater(data['left'][1] + data['width'][1], 1650)
+
+    def test_too_many_rows_fall_back_to_full_page(self):
+        form = np.full((1600, 600), 255, dtype=np.uint8)
+        for row in range(100, 1500, 100):
+            form[row:row + 12, 50:150] = 0
+            form[row:row + 12, 400:500] = 0
+        self.assertGreater(len(preprocess.text_regions(form)), preprocess.MAX_REGIONS)
+        preprocess.ocr_regions(form, fake_image_to_data)
+        self.assertEqual(fake_image_to_data.calls, [(1600, 600)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from PIL import Image
+from PyQt6.QtGui import QImage
+from src.view.qimage_bridge import PixmapCache, to_qimage
+
+
+def rgba(qimage, x, y):
+    return qimage.pixelColor(x, y).getRgb()
+
+
+class TestQImageBridge(unittest.TestCase):
+    def assert_converts(self, image, expected):
+        qimage = to_qimage(image)
+        self.assertEqual((qimage.width(), qimage.height()), image.size)
+        self.assertEqual(rgba(qimage, 2, 1), expected)
+
+    def test_pil_modes(self):
+        self.assert_converts(Image.new('RGB', (5, 3), (10, 20, 30)), (10, 20, 30, 255))
+        self.assert_converts(Image.new('RGBA', (5, 3), (10, 20, 30, 40)), (10, 20, 30, 40))
+        self.assert_converts(Image.new('L', (5, 3), 77), (77, 77, 77, 255))
+        self.assert_converts(Image.new('LA', (5, 3), (77, 128)), (77, 77, 77, 128))
+        self.assert_converts(Image.new('CMYK', (5, 3), (0, 255, 255, 0)), (255, 0, 0, 255))
+        self.assert_converts(Image.new('I;16', (5, 3), 65535), (255, 255, 255, 255))
+        self.assert_converts(Image.new('F', (5, 3), 200.0), (200, 200, 200, 255))
+
+    def test_bilevel_rows_are_bit_packed(self):
+        image = Image.new('1', (13, 2), 0)
+        image.putpixel((12, 1), 1)
+        qimage = to_qimage(image)
+        self.assertEqual(qimage.format(), QImage.Format.Format_Mono)
+        self.assertEqual(rgba(qimage, 12, 1), (255, 255, 255, 255))
+        self.assertEqual(rgba(qimage, 11, 1), (0, 0, 0, 255))
+
+    def test_palette_with_transparency(self):
+        image = Image.new('P', (5, 3), 1)
+        image.putpalette([255, 0, 0, 0, 0, 255])
+        image.putpixel((0, 0), 0)
+        image.info['transparency'] = 0
+        qimage = to_qimage(image)
+        self.assertEqual(qimage.format(), QImage.Format.Format_Indexed8)
+        self.assertEqual(rgba(qimage, 2, 1), (0, 0, 255, 255))
+        self.assertEqual(rgba(qimage, 0, 0)[3], 0)
+
+    def test_cache(self):
+        cache = PixmapCache(max_bytes=2 * 10 * 10 * 4)
+        made = []
+
+        def make(key):
+            made.append(key)
+            return QImage(10, 10, QImage.Format.Format_ARGB32)
+
+        cache.get(('page', 1), lambda: make(1))
+        cache.get(('page', 0.5), lambda: make(0.5))
+        cache.get(('page', 1), lambda: make(1))
+        self.assertEqual(made, [1, 0.5])
+        cache.get(('page', 0.25), lambda: make(0.25))
+        self.assertNotIn(('page', 0.5), cache)
+        self.assertIn(('page', 1), cache)
+        self.assertEqual(cache.current_bytes, 2 * 10 * 10 * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import pickle
+import unittest
+from PIL import Image
+from src.model.rect_store import RectangleStore
+from src.model.model import ImageContainer
+
+
+class TestRectangleStore(unittest.TestCase):
+    def setUp(self):
+        self.store = RectangleStore()
+        for i in range(40):
+            self.store.append(((i, i), (i + 10, i + 5), 'white' if i % 3 == 0 else 'black', i + 1))
+
+    def test_list_access(self):
+        self.assertEqual(len(self.store), 40)
+        self.assertEqual(self.store[0], ((0, 0), (10, 5), 'white', 1))
+        self.assertEqual(self.store[-1], ((39, 39), (49, 44), 'white', 40))
+        self.assertEqual([rectangle[3] for rectangle in self.store[38:]], [39, 40])
+        self.assertEqual(self.store.pop()[3], 40)
+        self.assertEqual(len(self.store), 39)
+        with self.assertRaises(IndexError):
+            self.store[39]
+
+    def test_remove_ids_keeps_order(self):
+        self.store.remove_ids({1, 2, 5})
+        self.assertEqual(len(self.store), 37)
+        self.assertEqual([rectangle[3] for rectangle in self.store[:3]], [3, 4, 6])
+        self.assertEqual([rectangle[2] for rectangle in self.store[:2]], ['black', 'white'])
+
+    def test_serialization(self):
+        self.store.append(((1, 2), (3, 4), 'red', 99))
+        for copy in (RectangleStore.from_bytes(self.store.to_bytes()), pickle.loads(pickle.dumps(self.store))):
+            self.assertEqual(list(copy), list(self.store))
+        copy.append(((0, 0), (1, 1), 'black', 100))
+        self.assertEqual(len(self.store), 41)
+        with self.assertRaises(ValueError):
+            RectangleStore.from_bytes(b'nope')
+
+    def test_empty_copies_can_grow(self):
+        empty = RectangleStore()
+        for copy in (empty.copy(), RectangleStore.from_bytes(empty.to_bytes()), pickle.loads(pickle.dumps(empty))):
+            copy.append(((0, 0), (1, 1), 'black', 1))
+            self.assertEqual(list(copy), [((0, 0), (1, 1), 'black', 1)])
+
+        container = ImageContainer(Image.new('RGB', (20, 20)), rectangles=RectangleStore())
+        container.draw_rectangle((2, 2), (5, 5))
+        self.assertEqual(len(container.rectangles), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,6 +66,87 @@ class TestSavePDF(unittest.TestCase):
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
 
+    def test_saved_pdf_pages(self):
+        """Test that saved pages keep their size and quality setting"""
+        import pypdfium2 as pdfium
+        self.controller._images = [self.image_container, ImageContainer(Image.new('L', (300, 150), color=255), (144, 72))]
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+            temp_path = temp_file.name
+
+        try:
+            for quality in ('high', 'low'):
+                self.controller._output_quality = quality
+                with patch('src.controller.controller.QFileDialog.getSaveFileName', return_value=(temp_path, '')):
+                    self.controller.save_file(export_current_page=False)
+
+                pdf = pdfium.PdfDocument(temp_path)
+                self.assertEqual(len(pdf), 2)
+                self.assertEqual(pdf.get_page_size(0), (100, 100))
+                self.assertEqual(pdf.get_page_size(1), (144, 72))
+                rendered = pdf[1].render(scale=300/144).to_pil()
+                self.assertGreater(rendered.convert('L').getpixel((150, 75)), 240)
+                pdf.close()
+
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def test_parallel_export_keeps_page_order(self):
+        """Test that pages finalized in worker processes are written in order"""
+        import pypdfium2 as pdfium
+        from src.model.document import save_document, export_pool, shutdown_export_pool
+        containers = []
+        for shade in range(0, 250, 50):
+            container = ImageContainer(Image.new('L', (60, 60), color=shade), (60, 60))
+            container.draw_rectangle((0, 0), (9, 9), 'white')
+            containers.append(container)
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+            temp_path = temp_file.name
+
+        try:
+            progress = Mock()
+            pool = export_pool(2)
+            self.addCleanup(shutdown_export_pool)
+            with patch('src.model.document.PARALLEL_EXPORT_PAGES', 2):
+                save_document(containers, temp_path, progress=progress, workers=2)
+            self.assertEqual(progress.call_count, len(containers))
+            # The workers are kept for the next export
+            self.assertIs(export_pool(2), pool)
+
+            pdf = pdfium.PdfDocument(temp_path)
+            self.assertEqual(len(pdf), len(containers))
+            for i, shade in enumerate(range(0, 250, 50)):
+                rendered = pdf[i].render().to_pil().convert('L')
+                self.assertAlmostEqual(rendered.getpixel((40, 40)), shade, delta=2)
+                self.assertEqual(rendered.getpixel((2, 2)), 255)
+            pdf.close()
+
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def test_failed_export_keeps_existing_file(self):
+        """Test that the target is only replaced once the PDF is complete"""
+        from src.model.pdf_writer import PdfWriter, encode_image
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.pdf')
+            with open(path, 'wb') as f:
+                f.write(b'previous export')
+
+            with self.assertRaises(RuntimeError):
+                with PdfWriter(path) as writer:
+                    writer.add_page(encode_image(self.test_image), 100, 100)
+                    raise RuntimeError('export failed')
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'previous export')
+            self.assertEqual(os.listdir(directory), ['out.pdf'])
+
+            with PdfWriter(path) as writer:
+                writer.add_page(encode_image(self.test_image), 100, 100)
+            with open(path, 'rb') as f:
+                self.assertTrue(f.read().startswith(b'%PDF-1.4'))
+            self.assertEqual(os.listdir(directory), ['out.pdf'])
+
     def test_save_file_no_images(self):
         """Test saving when no images are loaded"""
         self.controller._images = []
@@ -92,12 +173,12 @@ class TestSavePDF(unittest.TestCase):
         try:
             # Mock QMessageBox to avoid GUI issues in tests
             with patch('src.controller.controller.QFileDialog.getSaveFileName', return_value=(temp_path, '')), \
-                 patch('src.controller.controller.FPDF') as mock_fpdf_class, \
+                 patch('src.model.document.PdfWriter') as mock_writer_class, \
                  patch('src.controller.controller.QMessageBox.critical') as mock_critical:
-                # Mock FPDF to raise an exception during image addition
-                mock_fpdf_instance = Mock()
-                mock_fpdf_instance.add_page.side_effect = Exception("Mocked FPDF error")
-                mock_fpdf_class.return_value = mock_fpdf_instance
+                # Mock PdfWriter to raise an exception during image addition
+                mock_writer_instance = MagicMock()
+                mock_writer_instance.__enter__.return_value.add_page.side_effect = Exception("Mocked writer error")
+                mock_writer_class.return_value = mock_writer_instance
 
                 # This should trigger an error
                 self.controller.save_file(export_current_page=False)
@@ -0,0 +1,73 @@
+import os
+import time
+import threading
+import unittest
+from PIL import Image
+from PyQt6.QtWidgets import QApplication
+from src.controller.search_job import SearchJob
+from src.model.model import ImageContainer
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+class FakeEngine:
+    '''Yields pages in order, waiting for release before each one after the first.'''
+
+    def __init__(self):
+        self.release = threading.Semaphore(0)
+        self.closed = False
+
+    def run(self, containers):
+        try:
+            for index, container in enumerate(containers):
+                if index:
+                    self.release.acquire()
+                yield index, container
+        finally:
+            self.closed = True
+
+
+class TestSearchJob(unittest.TestCase):
+    def setUp(self):
+        # A QApplication, so that widget tests running later can use it
+        self.app = QApplication.instance() or QApplication([])
+        self.containers = [ImageContainer(Image.new('RGB', (10, 10)), (5, 5)) for _ in range(3)]
+        self.engine = FakeEngine()
+        self.events = []
+        self.job = SearchJob(self.engine, self.containers, lambda container: [container])
+        self.job.page_done.connect(lambda done, container, results: self.events.append(('page', done, len(results))))
+        self.job.finished.connect(lambda total: self.events.append(('finished', total)))
+
+    def process_until(self, condition, timeout=5):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.005)
+
+    def test_pages_are_reported_as_they_finish(self):
+        self.job.start()
+        self.process_until(lambda: self.events)
+        self.assertEqual(self.events, [('page', 1, 1)])
+        self.engine.release.release(2)
+        self.process_until(lambda: len(self.events) == 4)
+        self.assertEqual(self.events[1:], [('page', 2, 1), ('page', 3, 1), ('finished', 3)])
+
+    def test_results_are_not_stored_by_the_job(self):
+        self.job.start()
+        self.engine.release.release(2)
+        self.assertTrue(self.job.wait(5))
+        self.assertEqual([container.search_results for container in self.containers], [[]] * 3)
+
+    def test_cancel_stops_the_engine(self):
+        self.job.start()
+        self.process_until(lambda: self.events)
+        self.job.cancel()
+        self.engine.release.release(2)
+        self.assertTrue(self.job.wait(5))
+        self.app.processEvents()
+        self.assertEqual(self.events, [('page', 1, 1)])
+        self.assertTrue(self.engine.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
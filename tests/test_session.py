@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from PIL import Image
+from src.model.document import load_document
+from src.model.session import SessionError, SourceNotFoundError, load_session, save_session
+
+OCR_DATA = {'text': ['Hello'], 'left': [1], 'top': [2], 'width': [3], 'height': [4]}
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp_dir.name, 'scan.png')
+        Image.new('RGB', (300, 200), color='white').save(self.source)
+        self.session = os.path.join(self.tmp_dir.name, 'scan.coverup')
+        self.containers = load_document(self.source)
+        self.containers[0].draw_rectangle((10, 10), (50, 40))
+        self.containers[0].draw_rectangle((60, 10), (90, 40), 'white')
+        self.containers[0].ocr_data = OCR_DATA
+        save_session(self.containers, self.session, self.source)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        source, containers = load_session(self.session)
+        self.assertEqual(source, self.source)
+        self.assertEqual(list(containers[0].rectangles), list(self.containers[0].rectangles))
+        self.assertEqual(containers[0].ocr_data, OCR_DATA)
+        self.assertEqual(containers[0].search_text('hello')[0].bbox, (1, 2, 4, 6))
+        containers[0].draw_rectangle((0, 0), (5, 5))
+        self.assertEqual(containers[0].rectangles[-1][3], 3)
+        with zipfile.ZipFile(self.session) as archive:
+            self.assertNotIn('scan.png', ' '.join(archive.namelist()))
+
+    def test_moved_source(self):
+        moved_dir = os.path.join(self.tmp_dir.name, 'moved')
+        os.mkdir(moved_dir)
+        shutil.move(self.source, os.path.join(moved_dir, 'scan.png'))
+        with self.assertRaises(SourceNotFoundError):
+            load_session(self.session)
+        source, containers = load_session(self.session, os.path.join(moved_dir, 'scan.png'))
+        self.assertEqual(len(containers[0].rectangles), 2)
+
+    def test_changed_source_is_rejected(self):
+        Image.new('RGB', (300, 200), color='black').save(self.source)
+        with self.assertRaises(SessionError):
+            load_session(self.session)
+        with open(self.session, 'wb') as f:
+            f.write(b'not a zip')
+        with self.assertRaises(SessionError):
+            load_session(self.session)
+
+    def test_failed_save_keeps_the_previous_session(self):
+        with open(self.session, 'rb') as f:
+            previous = f.read()
+        self.containers[0].ocr_data = {'text': [object()]}
+        with self.assertRaises(TypeError):
+            save_session(self.containers, self.session, self.source)
+        with open(self.session, 'rb') as f:
+            self.assertEqual(f.read(), previous)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ['scan.coverup', 'scan.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
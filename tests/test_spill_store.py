@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from PIL import Image, ImageDraw
+from src.model.model import ImageContainer
+from src.model.page_cache import PageCache, image_nbytes
+from src.model.spill_store import SpillStore
+
+
+def page(mode):
+    image = Image.new(mode, (64, 48), 'white')
+    ImageDraw.Draw(image).rectangle((10, 10, 30, 20), fill='black')
+    return image
+
+
+class ShortWriter:
+    '''A file that takes 100 bytes of the first write and nothing after that.'''
+
+    def __init__(self, file):
+        self.file = file
+        self.writes = 0
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def write(self, data):
+        self.writes += 1
+        return self.file.write(data[:100]) if self.writes == 1 else 0
+
+
+class TestSpillStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = SpillStore(max_bytes=1024 * 1024, directory=self.temp_dir.name)
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        owners = {mode: object() for mode in ('1', 'L', 'RGB', 'RGBA')}
+        for mode, owner in owners.items():
+            self.store.put(owner, page(mode))
+        for mode, owner in owners.items():
+            image = self.store.get(owner)
+            self.assertEqual((image.mode, image.size, image.tobytes()), (mode, (64, 48), page(mode).tobytes()))
+        self.assertIsNone(self.store.get(object()))
+
+    def test_grayscale_page_is_mapped(self):
+        owner = object()
+        self.store.put(owner, page('L'))
+        image = self.store.get(owner)
+        self.assertTrue(image.readonly)
+
+        # Wiping the scratch file zeroes what the mapping shows
+        self.store.close()
+        self.assertEqual(np.asarray(image).max(), 0)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_budget(self):
+        store = SpillStore(max_bytes=image_nbytes(page('L')), directory=self.temp_dir.name)
+        first, second = object(), object()
+        store.put(first, page('L'))
+        store.put(second, page('L'))
+        self.assertIn(first, store)
+        self.assertNotIn(second, store)
+        store.close()
+        self.assertEqual(len(store), 0)
+
+    def test_short_write(self):
+        first, second = object(), object()
+        self.store.put(first, page('L'))
+        file = self.store._file
+        duplicate = os.fdopen(os.dup(file.fileno()), 'rb')
+        self.addCleanup(duplicate.close)
+        self.store._file = ShortWriter(file)
+        with self.assertRaises(OSError):
+            self.store.put(second, page('L'))
+        self.assertNotIn(second, self.store)
+        self.assertEqual(self.store.current_bytes, image_nbytes(page('L')))
+
+        # The partial page behind the first one is wiped too
+        self.store._file = file
+        self.store.close()
+        duplicate.seek(0)
+        data = duplicate.read()
+        self.assertGreater(len(data), image_nbytes(page('L')))
+        self.assertEqual(data.count(0), len(data))
+
+    def test_page_cache_cold_tier(self):
+        cache = PageCache(max_bytes=image_nbytes(page('L')), cold=self.store)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return page('L')
+
+        containers = [ImageContainer(None, (48, 48), loader=loader, cache=cache) for _ in range(2)]
+        containers[0].image
+        containers[1].image
+        self.assertIn(containers[0], self.store)
+        self.assertEqual(containers[0].image.tobytes(), page('L').tobytes())
+        self.assertEqual(len(calls), 2)
+
+        cache.clear()
+        self.assertEqual((len(self.store), self.store.current_bytes), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
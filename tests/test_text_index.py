@@ -0,0 +1,81 @@
+import os
+import re
+import tempfile
+import unittest
+from src.model.text_index import TextIndex
+from src.model.patterns import PatternSet, read_pattern_file
+
+OCR_DATA = {
+    'text': ['', 'John', 'Smith', 'lives', '', 'IBAN', 'DE89', '3704', '0044', 'here'],
+    'left': [0, 10, 60, 120, 0, 10, 60, 110, 160, 10],
+    'top': [0, 10, 12, 10, 0, 50, 50, 51, 50, 90],
+    'width': [0, 40, 50, 45, 0, 40, 40, 40, 40, 40],
+    'height': [0, 20, 20, 20, 0, 20, 20, 20, 20, 20],
+    'block_num': [1, 1, 1, 1, 1, 1, 1, 1, 1, 2],
+    'par_num': [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+    'line_num': [0, 1, 1, 1, 2, 2, 2, 2, 2, 1],
+}
+
+
+class TestTextIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TextIndex(OCR_DATA)
+
+    def test_joined_text(self):
+        self.assertEqual(self.index.text, 'John Smith lives\nIBAN DE89 3704 0044\nhere\n')
+        self.assertEqual(len(self.index), 8)
+
+    def test_phrase_match_merges_boxes(self):
+        results = self.index.search(re.compile('john smith', re.IGNORECASE))
+        self.assertEqual(results, [((10, 10, 110, 32), 'John Smith', 'john smith')])
+
+    def test_match_split_across_tokens(self):
+        results = self.index.search(re.compile(r'DE\d{2}(?: ?\d{4}){2}'))
+        self.assertEqual(results, [((60, 50, 200, 71), 'DE89 3704 0044', r'DE\d{2}(?: ?\d{4}){2}')])
+
+    def test_match_across_lines_gives_box_per_line(self):
+        results = self.index.search(re.compile(r'0044\s+here'))
+        self.assertEqual(results, [((160, 50, 200, 70), '0044', r'0044\s+here'), ((10, 90, 50, 110), 'here', r'0044\s+here')])
+
+    def test_partial_word_and_repeat_queries(self):
+        pattern = re.compile('ive')
+        results = self.index.search(pattern)
+        self.assertEqual(results, [((120, 10, 165, 30), 'lives', 'ive')])
+        results.clear()
+        self.assertEqual(len(self.index.search(pattern)), 1)
+        self.assertEqual(self.index.search(re.compile(r'\n')), [])
+
+
+
+class TestPatternSet(unittest.TestCase):
+    def setUp(self):
+        self.index = TextIndex(OCR_DATA)
+
+    def test_tags_matches(self):
+        patterns = PatternSet([r'john\s+smith', r'DE\d{2}', 'HERE', r'(?P<year>\d{4})', '[unclosed'])
+        results = patterns.search(self.index)
+        self.assertEqual(sorted((result.text, result.pattern) for result in results), [
+            ('0044', r'(?P<year>\d{4})'), ('3704', r'(?P<year>\d{4})'),
+            ('DE89', r'DE\d{2}'), ('John Smith', r'john\s+smith'), ('here', 'HERE')])
+        self.assertEqual(PatternSet([]).search(self.index), [])
+
+    def test_overlapping_patterns_are_all_found(self):
+        patterns = [r'john', r'john\s+smith\s+lives', r'smith']
+        results = PatternSet(patterns).search(self.index)
+        self.assertEqual([(result.text, result.pattern) for result in results], [
+            ('John', 'john'), ('John Smith lives', r'john\s+smith\s+lives'), ('Smith', 'smith')])
+        separately = {result.bbox for pattern in patterns for result in self.index.search(re.compile(pattern, re.IGNORECASE))}
+        self.assertEqual({result.bbox for result in results}, separately)
+
+    def test_read_pattern_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('# comment\n\\d{3}-\\d{2}\n\nfoo bar\n')
+        try:
+            self.assertEqual(read_pattern_file(f.name), [r'\d{3}-\d{2}', 'foo bar'])
+            self.assertEqual(len(PatternSet.from_file(f.name)), 2)
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.fixtures import write_pdf
+from src.model.document import load_document
+from src.model.ocr_engine import OcrEngine
+from src.model.page_cache import PageCache
+
+PAGE_TEXT = b'BT /F1 12 Tf 72 720 Td (John Smith 123-45-6789) Tj 0 -20 Td (Second line) Tj ET'
+
+# A scan covering the whole page, as drawn by a scanner
+SCAN = b'q 612 0 0 792 0 0 cm /Im1 Do Q'
+
+
+class TestTextLayer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'digital.pdf')
+        write_pdf(self.path, [PAGE_TEXT, b''])
+        self.page_cache = PageCache()
+        self.containers = load_document(self.path, self.page_cache)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_words_in_image_coordinates(self):
+        data, ocr_boxes = self.containers[0]._loader.text_layer()
+        self.assertEqual(ocr_boxes, [])
+        self.assertEqual(data['text'], ['John', 'Smith', '123-45-6789', 'Second', 'line'])
+        self.assertEqual(data['line_num'], [1, 1, 1, 2, 2])
+        # 72pt from the left and 72pt from the top at 150 dpi
+        self.assertAlmostEqual(data['left'][0], 150, delta=3)
+        self.assertAlmostEqual(data['top'][0], 150 - 12 * 150 / 72, delta=8)
+        self.assertIsNone(self.containers[1]._loader.text_layer())
+
+    def test_search_skips_ocr_on_pages_with_text(self):
+        with patch('src.model.model.image_to_data', return_value={'text': [], 'left': [], 'top': [], 'width': [], 'height': []}) as mock_ocr:
+            results = list(OcrEngine(workers=1).run(self.containers))
+            self.assertEqual([index for index, _ in results], [0, 1])
+            self.assertEqual(mock_ocr.call_count, 1)
+        self.assertEqual([result.text for result in self.containers[0].search_text(r'john smith|\d{3}-\d{2}')], ['John Smith', '123-45-6789'])
+        self.assertNotIn(self.containers[0], self.page_cache)
+        self.assertIn(self.containers[1], self.page_cache)
+
+    def test_scans_with_partial_text_need_ocr(self):
+        stamp = SCAN + b' BT /F1 10 Tf 480 760 Td (APPROVED) Tj ET'
+        # Invisible text over the whole scan, as OCR software writes it
+        ocr_layer = SCAN + b' BT 3 Tr /F1 12 Tf 72 740 Td' + b' (John Smith 123-45-6789 Account 42) Tj 0 -14 Td' * 45 + b' ET'
+        write_pdf(self.path, [stamp, ocr_layer, SCAN])
+        containers = load_document(self.path, self.page_cache)
+        self.assertIsNone(containers[0]._loader.text_layer())
+        self.assertEqual(containers[1]._loader.text_layer().words['text'][:3], ['John', 'Smith', '123-45-6789'])
+        self.assertIsNone(containers[2]._loader.text_layer())
+
+        with patch('src.model.model.image_to_data', return_value={'text': [], 'left': [], 'top': [], 'width': [], 'height': []}) as mock_ocr:
+            list(OcrEngine(workers=1).run(containers))
+            self.assertEqual(mock_ocr.call_count, 2)
+
+    def test_images_next_to_text_are_ocred_alone(self):
+        # A 612x90pt letterhead banner and a 400x250pt chart on a digital page
+        page = b'q 612 0 0 90 0 702 cm /Im1 Do Q q 400 0 0 250 100 100 cm /Im1 Do Q ' + PAGE_TEXT.replace(b'720', b'600')
+        write_pdf(self.path, [page])
+        container, = load_document(self.path, self.page_cache)
+        words, ocr_boxes = container._loader.text_layer()
+        self.assertEqual(words['text'][:3], ['John', 'Smith', '123-45-6789'])
+        scale = 150 / 72
+        self.assertEqual(len(ocr_boxes), 2)
+        for box, expected in zip(ocr_boxes, [(0, 0, 612, 90), (100, 442, 500, 692)]):
+            for value, point in zip(box, expected):
+                self.assertAlmostEqual(value, point * scale, delta=2)
+
+        word = {'text': ['Revenue'], 'left': [20], 'top': [15], 'width': [60], 'height': [12],
+                'block_num': [1], 'par_num': [1], 'line_num': [1]}
+        with patch('src.model.model.image_to_data', return_value=word) as mock_ocr:
+            list(OcrEngine(workers=1).run([container]))
+            self.assertEqual(mock_ocr.call_count, 2)
+            # Only the images are recognized, with a white border around them
+            height, width = mock_ocr.call_args_list[1][0][0].shape
+            self.assertAlmostEqual(width, 400 * scale + 20, delta=3)
+            self.assertAlmostEqual(height, 250 * scale + 20, delta=3)
+        self.assertEqual([result.text for result in container.search_text(r'john smith|revenue')],
+                         ['John Smith', 'Revenue', 'Revenue'])
+        chart = container.search_results[2].bbox
+        self.assertAlmostEqual(chart[0], 100 * scale + 10, delta=3)
+        self.assertAlmostEqual(chart[1], 442 * scale + 5, delta=3)
+
+    def test_force_ocr(self):
+        with patch('src.model.document.FORCE_OCR', True):
+            containers = load_document(self.path, self.page_cache)
+        self.assertFalse(containers[0].load_text_layer())
+
+
+if __name__ == '__main__':
+    unittest.main()
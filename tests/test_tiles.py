@@ -0,0 +1,113 @@
+import os
+import unittest
+from PIL import Image
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QApplication, QStyleOptionGraphicsItem
+from src.model.model import ImageContainer
+from src.model.tiles import TilePyramid
+from src.view.qimage_bridge import PixmapCache, pixmap_nbytes, to_pixmap
+from src.view.tiled_page_item import TiledPageItem
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+class TestTilePyramid(unittest.TestCase):
+    def setUp(self):
+        image = Image.new('RGB', (1000, 600), color='white')
+        image.paste((255, 0, 0), (600, 300, 1000, 600))
+        self.pyramid = TilePyramid(ImageContainer(image, (480, 288)), tile_size=256)
+
+    def test_levels(self):
+        self.assertEqual(self.pyramid.level_count, 3)
+        self.assertEqual(self.pyramid.level_for_scale(1.5), 0)
+        self.assertEqual(self.pyramid.level_for_scale(0.6), 0)
+        self.assertEqual(self.pyramid.level_for_scale(0.5), 1)
+        self.assertEqual(self.pyramid.level_for_scale(0.1), 2)
+        self.assertEqual(self.pyramid.level_image(2).size, (250, 150))
+
+    def test_tiles_in(self):
+        tiles = self.pyramid.tiles_in((0, 0, 1000, 600), 0)
+        self.assertEqual(len(tiles), 12)
+        self.assertEqual(tiles[-1], (3, 2, (768, 512, 1000, 600)))
+        self.assertEqual([tile[:2] for tile in self.pyramid.tiles_in((300, 300, 400, 310), 0)], [(1, 1)])
+        self.assertEqual(self.pyramid.tiles_in((0, 0, 1000, 600), 2), [(0, 0, (0, 0, 1000, 600))])
+
+    def test_tile(self):
+        tile = self.pyramid.tile(0, 3, 2)
+        self.assertEqual(tile.size, (232, 88))
+        self.assertEqual(tile.getpixel((100, 50)), (255, 0, 0))
+        self.assertEqual(self.pyramid.tile(1, 0, 0).size, (256, 256))
+
+    def test_reduced_levels_are_bounded(self):
+        pyramid = TilePyramid(self.pyramid.container, tile_size=64, max_levels=2)
+        self.assertEqual(pyramid.level_count, 5)
+        for level in range(1, pyramid.level_count):
+            self.assertEqual(pyramid.level_image(level).size, ((1000 + 2 ** level - 1) >> level, (600 + 2 ** level - 1) >> level))
+        self.assertEqual(list(pyramid._levels), [3, 4])
+        # Reduced from the page, as level 1 and 2 are gone
+        self.assertEqual(pyramid.level_image(2).getpixel((200, 100)), (255, 0, 0))
+        self.assertEqual(list(pyramid._levels), [4, 2])
+
+
+class TestTiledPageItem(unittest.TestCase):
+    def setUp(self):
+        self.app = QApplication.instance() or QApplication([])
+        if not isinstance(self.app, QApplication):
+            self.skipTest('needs a QApplication')
+        image = Image.new('RGB', (1000, 600), color='white')
+        image.paste((255, 0, 0), (600, 300, 1000, 600))
+        self.pyramid = TilePyramid(ImageContainer(image, (480, 288)), tile_size=256)
+        self.converted = []
+
+        def counting_to_pixmap(tile):
+            self.converted.append(tile.size)
+            return to_pixmap(tile)
+
+        self.tile_bytes = pixmap_nbytes(to_pixmap(Image.new('RGB', (256, 256))))
+        self.cache = PixmapCache(max_bytes=4 * self.tile_bytes)
+        self.item = TiledPageItem(self.pyramid, counting_to_pixmap, self.cache)
+
+    def render(self, source, size):
+        '''Paint the source rect of the page into an image of size, like a view showing it.'''
+        target = QImage(size[0], size[1], QImage.Format.Format_RGB32)
+        target.fill(0)
+        painter = QPainter(target)
+        painter.scale(size[0] / source.width(), size[1] / source.height())
+        painter.translate(-source.left(), -source.top())
+        option = QStyleOptionGraphicsItem()
+        option.exposedRect = source
+        self.item.paint(painter, option)
+        painter.end()
+        return target
+
+    def test_paints_exposed_tiles_only(self):
+        self.assertEqual(self.item.boundingRect(), QRectF(0, 0, 1000, 600))
+        target = self.render(QRectF(600, 300, 150, 100), (150, 100))
+        self.assertEqual(target.pixelColor(75, 50).getRgb()[:3], (255, 0, 0))
+        self.assertEqual(self.converted, [(256, 256)])
+
+        target = self.render(QRectF(500, 250, 200, 100), (200, 100))
+        self.assertEqual(target.pixelColor(10, 10).getRgb()[:3], (255, 255, 255))
+        self.assertEqual(target.pixelColor(190, 90).getRgb()[:3], (255, 0, 0))
+        self.assertEqual(len(self.converted), 4)
+
+    def test_zoomed_out_uses_coarse_level(self):
+        target = self.render(QRectF(0, 0, 1000, 600), (250, 150))
+        self.assertEqual(self.converted, [(250, 150)])
+        self.assertEqual(target.pixelColor(240, 140).getRgb()[:3], (255, 0, 0))
+
+    def test_tiles_are_charged_to_the_pixmap_cache(self):
+        self.cache.get('page', lambda: to_pixmap(Image.new('RGB', (256, 256))))
+        self.render(QRectF(0, 0, 1000, 600), (1000, 600))
+        self.assertEqual(len(self.converted), 12)
+        self.assertLessEqual(self.cache.current_bytes, 4 * self.tile_bytes)
+        self.assertNotIn('page', self.cache)
+
+        # Tiles still cached are not converted again
+        self.render(QRectF(768, 512, 232, 88), (232, 88))
+        self.assertEqual(len(self.converted), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()